@@ -7,7 +7,7 @@ import logging
 from allauth.account.adapter import DefaultAccountAdapter
 from allauth.account.utils import user_email
 from core.email_utils import safe_send_mail
-from core.models import SiteConfiguration
+from core.utils import cached_site_config
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +24,7 @@ class SafeAccountAdapter(DefaultAccountAdapter):
         """
         try:
             # Check if email is configured
-            config = SiteConfiguration.get_config()
+            config = cached_site_config()
             if not self._is_email_configured(config):
                 logger.warning(f"Email not configured, skipping email: {template_prefix}")
                 return
@@ -67,7 +67,7 @@ class SafeAccountAdapter(DefaultAccountAdapter):
         """
         Check if signup is allowed
         """
-        config = SiteConfiguration.get_config()
+        config = cached_site_config()
         if config and hasattr(config, 'allow_user_registration'):
             return config.allow_user_registration
         return True  # Default to allowing registration
@@ -95,7 +95,7 @@ class SafeAccountAdapter(DefaultAccountAdapter):
         """
         try:
             # Check if email verification is required
-            config = SiteConfiguration.get_config()
+            config = cached_site_config()
             if config and hasattr(config, 'require_email_verification') and not config.require_email_verification:
                 logger.info("Email verification disabled, skipping confirmation email")
                 return
@@ -156,10 +156,10 @@ class EmailVerification(BaseModel):
         try:
             from django.urls import reverse
             from django.contrib.sites.models import Site
-            from core.models import SiteConfiguration
+            from core.utils import cached_site_config
 
             # Apply email settings
-            config = SiteConfiguration.get_config()
+            config = cached_site_config()
             config.apply_email_settings()
 
             subject = 'Verify Your Email - Edunox GH'
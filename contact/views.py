@@ -5,7 +5,8 @@ from django.conf import settings
 from django.views.generic import TemplateView
 from .forms import ContactForm
 from .models import ContactMessage, ContactAttachment
-from core.models import SiteConfiguration
+from core.storage import save_field_files
+from core.utils import cached_site_config
 
 
 class ContactView(TemplateView):
@@ -14,7 +15,7 @@ class ContactView(TemplateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['site_config'] = SiteConfiguration.get_config()
+        context['site_config'] = cached_site_config()
         context['form'] = ContactForm(user=self.request.user)
         return context
     
@@ -28,17 +29,23 @@ class ContactView(TemplateView):
                 contact_message.user = request.user
             contact_message.save()
             
-            # Handle file attachments
+            # Handle file attachments: upload them together, then insert the rows
             files = request.FILES.getlist('attachments')
-            for file in files:
-                ContactAttachment.objects.create(
+            attachments = [
+                ContactAttachment(
                     contact_message=contact_message,
-                    file=file
+                    file=file,
+                    original_filename=file.name,
+                    file_size=file.size
                 )
+                for file in files
+            ]
+            save_field_files(attachment.file for attachment in attachments)
+            ContactAttachment.objects.bulk_create(attachments)
             
             # Send notification email to admin
             try:
-                site_config = SiteConfiguration.get_config()
+                site_config = cached_site_config()
                 subject = f"New Contact Message: {contact_message.subject}"
                 message = f"""
                 New contact message received:
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        import core.signals
+
+        from django.conf import settings
+        from .logging_queue import start_listener, uses_log_queue
+        if uses_log_queue(getattr(settings, 'LOGGING', None)):
+            start_listener()
@@ -0,0 +1,30 @@
+"""
+Authentication backends for Edunox GH
+"""
+
+from allauth.account.auth_backends import AuthenticationBackend
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+
+class ProfileJoinMixin:
+    """
+    Load the session user together with its profile in a single query,
+    so request.user.profile never costs a second round trip
+    """
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related('profile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+class JoinedModelBackend(ProfileJoinMixin, ModelBackend):
+    """Django's ModelBackend with the profile joined on get_user"""
+
+
+class JoinedAuthenticationBackend(ProfileJoinMixin, AuthenticationBackend):
+    """allauth's AuthenticationBackend with the profile joined on get_user"""
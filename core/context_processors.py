@@ -3,7 +3,7 @@ Context processors for Edunox GH
 Makes site configuration available to all templates
 """
 
-from .models import SiteConfiguration
+from .utils import cached_site_config
 
 
 def site_config(request):
@@ -16,7 +16,7 @@ def site_config(request):
     {{ site_config.logo.url }}
     """
     try:
-        config = SiteConfiguration.get_config()
+        config = cached_site_config()
         return {
             'site_config': config
         }
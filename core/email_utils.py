@@ -1,9 +1,9 @@
 import logging
-from django.core.mail import send_mail as django_send_mail, EmailMultiAlternatives
+from django.core.mail import send_mail as django_send_mail, EmailMultiAlternatives, get_connection
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
-from .models import SiteConfiguration
+from .utils import cached_site_config
 
 logger = logging.getLogger(__name__)
 
@@ -11,7 +11,7 @@ logger = logging.getLogger(__name__)
 def get_email_headers(config=None):
     """Get email headers to improve deliverability and prevent spam"""
     if not config:
-        config = SiteConfiguration.get_config()
+        config = cached_site_config()
 
     headers = {
         'X-Mailer': 'Edunox GH v1.0',
@@ -43,7 +43,7 @@ def safe_send_mail(subject, message, from_email=None, recipient_list=None,
     """
     try:
         # Get site configuration
-        config = SiteConfiguration.get_config()
+        config = cached_site_config()
         
         # Check if email is properly configured
         if not _is_email_configured(config):
@@ -125,7 +125,7 @@ def send_html_email(subject, template_name, context, recipient_list, from_email=
     """
     try:
         # Get email configuration
-        config = SiteConfiguration.get_config()
+        config = cached_site_config()
 
         # Check if email is properly configured
         if not _is_email_configured(config):
@@ -222,35 +222,51 @@ def send_verification_email_safe(user, verification_url):
         return False
 
 
-def test_email_configuration():
-    """Test email configuration without sending actual email"""
+def test_email_configuration(keep_connection=False):
+    """
+    Test email configuration without sending actual email
+
+    With keep_connection=True a third value is returned: the opened SMTP
+    backend (or None), so the caller can send through it without a second
+    handshake. The caller is responsible for closing it.
+    """
+    connection = None
     try:
-        config = SiteConfiguration.get_config()
+        config = cached_site_config()
         
         if not config:
-            return False, "Site configuration not found"
-        
-        if not _is_email_configured(config):
-            return False, "Email configuration incomplete"
-        
-        # Test connection without sending email
-        if config.email_backend == 'django.core.mail.backends.smtp.EmailBackend':
-            import smtplib
-            
+            success, message = False, "Site configuration not found"
+        elif not _is_email_configured(config):
+            success, message = False, "Email configuration incomplete"
+        elif config.email_backend == 'django.core.mail.backends.smtp.EmailBackend':
+            # Test connection without sending email
             try:
-                server = smtplib.SMTP(config.email_host, config.email_port)
-                if config.email_use_tls:
-                    server.starttls()
-                server.login(config.email_host_user, config.email_host_password)
-                server.quit()
-                return True, "Email configuration is valid"
+                connection = get_connection(
+                    backend=config.email_backend,
+                    host=config.email_host,
+                    port=config.email_port,
+                    username=config.email_host_user,
+                    password=config.email_host_password,
+                    use_tls=config.email_use_tls,
+                    use_ssl=config.email_use_ssl,
+                    fail_silently=False
+                )
+                connection.open()
+                success, message = True, "Email configuration is valid"
             except Exception as e:
-                return False, f"SMTP connection failed: {str(e)}"
-        
-        return True, "Email configuration appears valid"
+                connection = None
+                success, message = False, f"SMTP connection failed: {str(e)}"
+        else:
+            success, message = True, "Email configuration appears valid"
         
     except Exception as e:
-        return False, f"Configuration test failed: {str(e)}"
+        success, message = False, f"Configuration test failed: {str(e)}"
+
+    if keep_connection:
+        return success, message, connection
+    if connection is not None:
+        connection.close()
+    return success, message
 
 
 class EmailConfigurationError(Exception):
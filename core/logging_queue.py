@@ -0,0 +1,75 @@
+"""
+Background log writer for Edunox GH
+
+Request threads only put records on log_queue (see the 'queue' handler in
+core.optimization.LOGGING_OPTIMIZATIONS); a QueueListener thread does the
+console and rotating-file I/O. Importing this module has no side effects:
+CoreConfig.ready() calls start_listener() when LOGGING uses the queue, and
+records logged before then wait on the queue.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+from django.conf import settings
+
+log_queue = queue.Queue(-1)
+
+# How LOGGING refers to log_queue
+LOG_QUEUE_REF = 'ext://core.logging_queue.log_queue'
+
+_listener = None
+
+
+def uses_log_queue(logging_config):
+    """Whether a LOGGING dict sends any handler's records to log_queue"""
+    handlers = (logging_config or {}).get('handlers', {})
+    return any(handler.get('queue') == LOG_QUEUE_REF for handler in handlers.values())
+
+
+def _build_handlers():
+    verbose = logging.Formatter(
+        '{levelname} {asctime} {module} {process:d} {thread:d} {message}', style='{'
+    )
+    simple = logging.Formatter('{levelname} {message}', style='{')
+
+    log_dir = os.path.join(settings.BASE_DIR, 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(
+        os.path.join(log_dir, 'django.log'),
+        maxBytes=1024 * 1024 * 15,  # 15MB
+        backupCount=10,
+    )
+    file_handler.setLevel(logging.INFO)
+    file_handler.setFormatter(verbose)
+
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(simple)
+
+    return file_handler, console_handler
+
+
+def start_listener():
+    """Start the thread that writes queued records; safe to call more than once"""
+    global _listener
+    if _listener is None:
+        _listener = logging.handlers.QueueListener(
+            log_queue, *_build_handlers(), respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(stop_listener)
+    return _listener
+
+
+def stop_listener():
+    """Flush the queue and stop the listener, if it is running"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -2,9 +2,11 @@
 Comprehensive SEO Check Management Command
 Quick SEO health check and recommendations for EduLink GH
 """
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
 from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
 from django.conf import settings
-from django.contrib.sites.models import Site
 from django.test import Client
 from core.models import SiteConfiguration
 from services.models import Service, ServiceCategory
@@ -28,10 +30,14 @@ class Command(BaseCommand):
         self.stdout.write(self.style.WARNING('📋 Basic Configuration:'))
         
         # Site framework
-        try:
-            site = Site.objects.get_current()
-            self.stdout.write(f"✅ Site: {site.domain}")
-        except:
+        if apps.is_installed('django.contrib.sites'):
+            from django.contrib.sites.models import Site
+            try:
+                site = Site.objects.get_current()
+                self.stdout.write(f"✅ Site: {site.domain}")
+            except (Site.DoesNotExist, ImproperlyConfigured, DatabaseError):
+                self.stdout.write("❌ Site framework not configured")
+        else:
             self.stdout.write("❌ Site framework not configured")
         
         # Site configuration
@@ -53,15 +59,12 @@ class Command(BaseCommand):
             self.stdout.write(f"❌ Site config error: {e}")
         
         # Settings check
-        if hasattr(settings, 'SITE_NAME'):
-            self.stdout.write(f"✅ SITE_NAME: {settings.SITE_NAME}")
-        else:
-            self.stdout.write("⚠️  SITE_NAME not set")
-            
-        if hasattr(settings, 'SITE_URL'):
-            self.stdout.write(f"✅ SITE_URL: {settings.SITE_URL}")
-        else:
-            self.stdout.write("⚠️  SITE_URL not set")
+        for name in ('SITE_NAME', 'SITE_URL'):
+            value = getattr(settings, name, None)
+            if value:
+                self.stdout.write(f"✅ {name}: {value}")
+            else:
+                self.stdout.write(f"⚠️  {name} not set")
         
         self.stdout.write("")
 
@@ -105,10 +108,9 @@ class Command(BaseCommand):
             response = client.get('/robots.txt')
             
             if response.status_code == 200:
-                content = response.content.decode()
                 self.stdout.write("✅ Robots.txt accessible")
                 
-                if 'Sitemap:' in content:
+                if b'Sitemap:' in response.content:
                     self.stdout.write("✅ Sitemap reference found")
                 else:
                     self.stdout.write("⚠️  No sitemap reference")
@@ -138,9 +140,15 @@ class Command(BaseCommand):
         self.stdout.write(f"📊 Resources: {resources.count()} total")
         self.stdout.write(f"   With content: {resources_with_content.count()}")
         
-        # Categories
-        service_cats = ServiceCategory.objects.filter(is_active=True).count()
-        resource_cats = ResourceCategory.objects.filter(is_active=True).count()
+        # Categories (both counts in one round trip)
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT (SELECT COUNT(*) FROM {qn(ServiceCategory._meta.db_table)} WHERE is_active = %s), "
+                f"(SELECT COUNT(*) FROM {qn(ResourceCategory._meta.db_table)} WHERE is_active = %s)",
+                [True, True]
+            )
+            service_cats, resource_cats = cursor.fetchone()
         
         self.stdout.write(f"📊 Categories: {service_cats} services, {resource_cats} resources")
         
@@ -160,13 +168,14 @@ class Command(BaseCommand):
             "8. 🔷 Add schema markup for services",
         ]
         
-        for rec in recommendations:
-            self.stdout.write(f"   {rec}")
-        
-        self.stdout.write(f"\n🎯 Quick Actions:")
-        self.stdout.write("   • Visit /sitemap.xml")
-        self.stdout.write("   • Visit /robots.txt") 
-        self.stdout.write("   • Test at PageSpeed Insights")
-        self.stdout.write("   • Submit to Google Search Console")
+        lines = [f"   {rec}" for rec in recommendations]
+        lines += [
+            "\n🎯 Quick Actions:",
+            "   • Visit /sitemap.xml",
+            "   • Visit /robots.txt",
+            "   • Test at PageSpeed Insights",
+            "   • Submit to Google Search Console",
+        ]
+        self.stdout.write("\n".join(lines))
         
         self.stdout.write(self.style.SUCCESS(f"\n✨ Run 'python manage.py seo_audit --full' for detailed analysis"))
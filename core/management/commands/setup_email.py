@@ -3,7 +3,6 @@ Management command to safely setup and test email configuration
 """
 
 from django.core.management.base import BaseCommand
-from django.core.mail import send_mail
 from core.models import SiteConfiguration
 from core.email_utils import test_email_configuration, safe_send_mail
 import getpass
@@ -48,24 +47,29 @@ class Command(BaseCommand):
         """Test current email configuration"""
         self.stdout.write('\n🧪 Testing current email configuration...')
         
-        success, message = test_email_configuration()
+        success, message, connection = test_email_configuration(keep_connection=True)
         
-        if success:
-            self.stdout.write(self.style.SUCCESS(f'✅ {message}'))
-            
-            # Try sending a test email
-            try:
-                result = safe_send_mail(
-                    subject='Edunox GH - Configuration Test',
-                    message='This is a test email to verify your configuration is working.',
-                    recipient_list=['admin@example.com'],  # Won't actually send
-                    fail_silently=False
-                )
-                self.stdout.write(self.style.SUCCESS('✅ Email sending mechanism is working'))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'❌ Email sending failed: {e}'))
-        else:
+        if not success:
             self.stdout.write(self.style.ERROR(f'❌ {message}'))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {message}'))
+        
+        # Try sending a test email over the connection that was just verified
+        try:
+            safe_send_mail(
+                subject='Edunox GH - Configuration Test',
+                message='This is a test email to verify your configuration is working.',
+                recipient_list=['admin@example.com'],  # Won't actually send
+                fail_silently=False,
+                connection=connection
+            )
+            self.stdout.write(self.style.SUCCESS('✅ Email sending mechanism is working'))
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'❌ Email sending failed: {e}'))
+        finally:
+            if connection is not None:
+                connection.close()
 
     def setup_gmail(self):
         """Setup Gmail SMTP configuration"""
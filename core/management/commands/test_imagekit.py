@@ -5,11 +5,22 @@ Usage: python manage.py test_imagekit
 
 from django.core.management.base import BaseCommand
 from django.conf import settings
-from imagekitio import ImageKit
-import tempfile
-import os
-from PIL import Image
-import io
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from types import MappingProxyType
+import base64
+import time
+
+# Precomputed 1x1 red PNG used as the upload payload
+TEST_PNG = base64.b64decode(
+    b'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1PeAAAADElEQVR4nGP4z8AAAAMBAQDJ/pLvAAAAAElFTkSuQmCC'
+)
+
+# Upload options shared by every test upload. The SDK rewrites the options
+# object it is given, so a fresh UploadFileRequestOptions is built per call.
+TEST_UPLOAD_OPTIONS = MappingProxyType({
+    'folder': '/edunox/test/',
+    'use_unique_file_name': True,
+})
 
 class Command(BaseCommand):
     help = 'Test ImageKit integration and upload functionality'
@@ -20,6 +31,18 @@ class Command(BaseCommand):
             action='store_true',
             help='Test file upload to ImageKit',
         )
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=1,
+            help='Number of upload+delete round trips for --upload-test',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Number of round trips to run in parallel for --upload-test',
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(
@@ -27,73 +50,68 @@ class Command(BaseCommand):
         )
         
         # Test 1: Check configuration
-        self.test_configuration()
+        credentials = self.test_configuration()
         
         # Test 2: Initialize ImageKit client
-        imagekit_client = self.test_client_initialization()
+        imagekit_client = self.test_client_initialization(credentials) if credentials else None
         
         if imagekit_client and options['upload_test']:
             # Test 3: Upload test file
-            self.test_file_upload(imagekit_client)
+            if options['count'] > 1 or options['concurrency'] > 1:
+                self.test_upload_throughput(
+                    imagekit_client, options['count'], options['concurrency']
+                )
+            else:
+                self.test_file_upload(imagekit_client)
         
         self.stdout.write(
             self.style.SUCCESS('✅ ImageKit integration test completed!')
         )
 
     def test_configuration(self):
-        """Test ImageKit configuration"""
+        """Test ImageKit configuration, returning the validated credentials or None"""
         self.stdout.write('\n📋 Testing Configuration...')
         
         try:
-            private_key = getattr(settings, 'IMAGEKIT_PRIVATE_KEY', None)
-            public_key = getattr(settings, 'IMAGEKIT_PUBLIC_KEY', None)
-            url_endpoint = getattr(settings, 'IMAGEKIT_URL_ENDPOINT', None)
+            keys = ('IMAGEKIT_PRIVATE_KEY', 'IMAGEKIT_PUBLIC_KEY', 'IMAGEKIT_URL_ENDPOINT')
+            private_key, public_key, url_endpoint = values = [
+                getattr(settings, key, None) for key in keys
+            ]
             
-            if not private_key:
-                self.stdout.write(
-                    self.style.ERROR('❌ IMAGEKIT_PRIVATE_KEY not configured')
-                )
-                return False
+            for key, value in zip(keys, values):
+                if not value:
+                    self.stdout.write(
+                        self.style.ERROR(f'❌ {key} not configured')
+                    )
+                    return None
             
-            if not public_key:
-                self.stdout.write(
-                    self.style.ERROR('❌ IMAGEKIT_PUBLIC_KEY not configured')
-                )
-                return False
+            self.stdout.write(self.style.SUCCESS('\n'.join([
+                f'✅ Private Key: {private_key[:20]}...',
+                f'✅ Public Key: {public_key[:20]}...',
+                f'✅ URL Endpoint: {url_endpoint}',
+            ])))
             
-            if not url_endpoint:
-                self.stdout.write(
-                    self.style.ERROR('❌ IMAGEKIT_URL_ENDPOINT not configured')
-                )
-                return False
-            
-            self.stdout.write(
-                self.style.SUCCESS(f'✅ Private Key: {private_key[:20]}...')
-            )
-            self.stdout.write(
-                self.style.SUCCESS(f'✅ Public Key: {public_key[:20]}...')
-            )
-            self.stdout.write(
-                self.style.SUCCESS(f'✅ URL Endpoint: {url_endpoint}')
-            )
-            
-            return True
+            return private_key, public_key, url_endpoint
             
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'❌ Configuration error: {e}')
             )
-            return False
+            return None
 
-    def test_client_initialization(self):
+    def test_client_initialization(self, credentials):
         """Test ImageKit client initialization"""
         self.stdout.write('\n🔌 Testing Client Initialization...')
         
+        private_key, public_key, url_endpoint = credentials
+        
         try:
+            from imagekitio import ImageKit
+
             imagekit = ImageKit(
-                private_key=settings.IMAGEKIT_PRIVATE_KEY,
-                public_key=settings.IMAGEKIT_PUBLIC_KEY,
-                url_endpoint=settings.IMAGEKIT_URL_ENDPOINT
+                private_key=private_key,
+                public_key=public_key,
+                url_endpoint=url_endpoint
             )
             
             self.stdout.write(
@@ -113,29 +131,19 @@ class Command(BaseCommand):
         self.stdout.write('\n📤 Testing File Upload...')
         
         try:
-            # Create a test image
-            test_image = Image.new('RGB', (100, 100), color='red')
-            
-            # Save to bytes
-            img_bytes = io.BytesIO()
-            test_image.save(img_bytes, format='PNG')
-            img_bytes.seek(0)
-            
             # Upload to ImageKit
+            from imagekitio.models.UploadFileRequestOptions import UploadFileRequestOptions
+
             try:
                 upload_response = imagekit_client.upload_file(
-                    file=img_bytes.getvalue(),
+                    file=TEST_PNG,
                     file_name='test_upload.png',
-                    options={
-                        "folder": "/edunox/test/",
-                        "use_unique_file_name": True,
-                        "response_fields": ["name", "size", "file_id", "url"]
-                    }
+                    options=UploadFileRequestOptions(**TEST_UPLOAD_OPTIONS)
                 )
             except Exception as upload_error:
                 # Try simpler upload format for different SDK versions
                 upload_response = imagekit_client.upload_file(
-                    file=img_bytes.getvalue(),
+                    file=TEST_PNG,
                     file_name='test_upload.png'
                 )
 
@@ -184,6 +192,56 @@ class Command(BaseCommand):
                 self.style.ERROR(f'❌ Upload test failed: {e}')
             )
 
+    def test_upload_throughput(self, imagekit_client, count, concurrency):
+        """Run several upload+delete round trips in parallel and report latency"""
+        self.stdout.write(
+            f'\n📤 Testing Upload Throughput ({count} uploads, concurrency {concurrency})...'
+        )
+        
+        timings = []
+        failures = 0
+        started = time.perf_counter()
+        
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+            futures = [
+                executor.submit(self._upload_one, imagekit_client, index)
+                for index in range(count)
+            ]
+            for future in as_completed(futures):
+                try:
+                    timings.append(future.result())
+                except Exception as e:
+                    failures += 1
+                    self.stdout.write(self.style.ERROR(f'❌ Round trip failed: {e}'))
+        
+        total = time.perf_counter() - started
+        
+        if timings:
+            timings.sort()
+            p50 = timings[len(timings) // 2]
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(
+                self.style.SUCCESS(f'✅ {len(timings)}/{count} round trips succeeded in {total:.2f}s')
+            )
+            self.stdout.write(f'   ⏱️  p50: {p50 * 1000:.0f} ms, p95: {p95 * 1000:.0f} ms')
+        if failures:
+            self.stdout.write(self.style.ERROR(f'❌ {failures} round trips failed'))
+
+    def _upload_one(self, imagekit_client, index):
+        """Upload and delete the test PNG once, returning the elapsed seconds"""
+        from imagekitio.models.UploadFileRequestOptions import UploadFileRequestOptions
+
+        started = time.perf_counter()
+        upload_response = imagekit_client.upload_file(
+            file=TEST_PNG,
+            file_name=f'test_upload_{index}.png',
+            options=UploadFileRequestOptions(**TEST_UPLOAD_OPTIONS)
+        )
+        file_id = getattr(upload_response, 'file_id', None)
+        if file_id:
+            imagekit_client.delete_file(file_id=file_id)
+        return time.perf_counter() - started
+
     def test_file_deletion(self, imagekit_client, file_id):
         """Test file deletion from ImageKit"""
         if not file_id:
@@ -2,12 +2,32 @@
 Management command to upload logo to ImageKit and update site configuration
 """
 from django.core.management.base import BaseCommand
-from django.core.files.base import ContentFile
+from django.core.files import File
 from core.models import SiteConfiguration
+from core.storage import ImageKitStorage
+from tempfile import SpooledTemporaryFile
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import requests
+import shutil
 import os
 
 
+# Downloads larger than this are spooled to a temporary file on disk
+SPOOL_MAX_SIZE = 5 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+# Shared keep-alive session so repeated downloads reuse pooled connections
+_SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504)),
+)
+_SESSION.mount('https://', _adapter)
+_SESSION.mount('http://', _adapter)
+
+
 class Command(BaseCommand):
     help = 'Upload a logo to ImageKit and update site configuration'
 
@@ -45,23 +65,23 @@ class Command(BaseCommand):
                     )
                     return
 
+                # Hand the open file to storage instead of reading it into memory
                 with open(logo_path, 'rb') as f:
-                    file_content = f.read()
-                    filename = os.path.basename(logo_path)
+                    self.save_logo(config, File(f, name=os.path.basename(logo_path)))
 
-            elif logo_url:
-                # Download from URL
-                response = requests.get(logo_url)
-                response.raise_for_status()
-                file_content = response.content
-                filename = 'logo.png'
+            elif logo_url and self.upload_remote_logo(config, logo_url):
+                # ImageKit fetched the logo straight from the source URL
+                pass
 
-            # Create Django file object
-            django_file = ContentFile(file_content, name=filename)
-
-            # Save to site configuration (this will upload to ImageKit)
-            config.logo = django_file
-            config.save()
+            elif logo_url:
+                # Download from URL, spooling to disk past SPOOL_MAX_SIZE
+                with _SESSION.get(logo_url, stream=True, timeout=(5, 30)) as response:
+                    response.raise_for_status()
+                    response.raw.decode_content = True
+                    with SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as tmp:
+                        shutil.copyfileobj(response.raw, tmp, length=CHUNK_SIZE)
+                        tmp.seek(0)
+                        self.save_logo(config, File(tmp, name='logo.png'))
 
             self.stdout.write(
                 self.style.SUCCESS(
@@ -73,3 +93,28 @@ class Command(BaseCommand):
             self.stdout.write(
                 self.style.ERROR(f'Error uploading logo: {str(e)}')
             )
+
+    def upload_remote_logo(self, config, logo_url):
+        """
+        Let ImageKit pull the logo from its URL so the bytes bypass this host.
+        Returns False when the storage can't do that, so the caller downloads it.
+        """
+        storage = config.logo.storage
+        if not isinstance(storage, ImageKitStorage) or not hasattr(storage, 'imagekit'):
+            return False
+
+        try:
+            config.logo = storage.save_from_url('logo.png', logo_url)
+        except Exception as e:
+            self.stdout.write(
+                self.style.WARNING(f'Direct ImageKit upload failed, downloading instead: {e}')
+            )
+            return False
+
+        config.save()
+        return True
+
+    def save_logo(self, config, django_file):
+        """Save the logo on the site configuration (this will upload to ImageKit)"""
+        config.logo = django_file
+        config.save()
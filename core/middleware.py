@@ -2,12 +2,44 @@
 Middleware for Edunox GH
 """
 
-from django.utils.deprecation import MiddlewareMixin
+from django.core.exceptions import ObjectDoesNotExist, SuspiciousOperation
+from django.utils.functional import SimpleLazyObject
 from django.conf import settings
-from .models import SiteConfiguration
+from .utils import cached_site_config
 
 
-class DynamicEmailSettingsMiddleware(MiddlewareMixin):
+# Environment-configured console backend wins over the database settings
+_SKIP_DYNAMIC_EMAIL = 'console' in getattr(settings, 'EMAIL_BACKEND', '').lower()
+
+SMTP_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+REQUIRED_SMTP_FIELDS = ('email_host', 'email_host_user', 'email_host_password', 'default_from_email')
+
+# Email settings last applied in this process. The configuration itself is
+# cached by cached_site_config(); this only avoids re-applying unchanged values.
+# Reset by the SiteConfiguration post_save signal.
+_APPLIED_EMAIL = {'signature': None}
+
+
+def reset_config_cache():
+    """Force the next request to re-apply the email settings"""
+    _APPLIED_EMAIL['signature'] = None
+
+
+def _email_signature(config):
+    """Hashable snapshot of the email fields applied to settings"""
+    return (
+        config.email_backend,
+        config.email_host,
+        config.email_port,
+        config.email_use_tls,
+        config.email_use_ssl,
+        config.email_host_user,
+        config.email_host_password,
+        config.default_from_email,
+    )
+
+
+class DynamicEmailSettingsMiddleware:
     """
     Middleware to apply email settings from SiteConfiguration
     This ensures email settings are always up-to-date from admin panel
@@ -15,18 +47,27 @@ class DynamicEmailSettingsMiddleware(MiddlewareMixin):
     
     def __init__(self, get_response):
         self.get_response = get_response
-        super().__init__(get_response)
+    
+    def __call__(self, request):
+        self.process_request(request)
+        return self.get_response(request)
     
     def process_request(self, request):
         """Apply email settings from database configuration"""
+        if _SKIP_DYNAMIC_EMAIL:
+            return None
+
         try:
-            config = SiteConfiguration.get_config()
+            config = cached_site_config()
+
             if config and self._is_email_config_complete(config):
-                # Only apply if not using console backend from environment
-                from django.conf import settings
-                env_backend = getattr(settings, 'EMAIL_BACKEND', '')
-                if 'console' not in env_backend.lower():
-                    config.apply_email_settings()
+                signature = _email_signature(config)
+                if signature == _APPLIED_EMAIL['signature']:
+                    # Settings already reflect this configuration
+                    return None
+
+                config.apply_email_settings()
+                _APPLIED_EMAIL['signature'] = signature
         except Exception:
             # If there's any error, continue with default settings
             pass
@@ -38,29 +79,57 @@ class DynamicEmailSettingsMiddleware(MiddlewareMixin):
         if not config.email_backend:
             return False
 
+        # For other backends, allow them through
+        if config.email_backend != SMTP_BACKEND:
+            return True
+
         # For SMTP backend, require all necessary fields
-        if config.email_backend == 'django.core.mail.backends.smtp.EmailBackend':
-            return (config.email_host and
-                   config.email_host_user and
-                   config.email_host_password and
-                   config.default_from_email)
+        return all(getattr(config, field) for field in REQUIRED_SMTP_FIELDS)
 
-        # For other backends, allow them through
-        return True
 
+# Paths that never render a template with the user's avatar
+_PROFILE_PICTURE_SKIP_PREFIXES = (
+    '/static/', '/media/', '/api/', '/health/', '/favicon.ico',
+    '/robots.txt', '/sitemap',
+)
+
+
+def _get_profile_picture_url(user):
+    """
+    Resolve the profile picture URL for a user, or None.
 
-class ProfilePictureMiddleware(MiddlewareMixin):
+    Runs while a template renders, outside the middleware, so any lookup or
+    storage failure has to be handled here rather than break the page.
+    """
+    try:
+        profile = user.profile
+        return profile.profile_picture.url if profile.profile_picture else None
+    except (ObjectDoesNotExist, ValueError, OSError, SuspiciousOperation):
+        # No profile, no file on the field, or the storage backend failed
+        # (requests' network errors are OSErrors)
+        return None
+
+
+class ProfilePictureMiddleware:
     """
     Middleware to ensure user profile picture is available in all templates
     """
     
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        self.process_request(request)
+        return self.get_response(request)
+    
     def process_request(self, request):
-        """Add user profile picture to request context"""
+        """Add a lazily resolved user profile picture to the request user"""
+        if request.path.startswith(_PROFILE_PICTURE_SKIP_PREFIXES):
+            return None
+
         if hasattr(request, 'user') and request.user.is_authenticated:
-            try:
-                profile = request.user.userprofile
-                request.user.profile_picture_url = profile.profile_picture.url if profile.profile_picture else None
-            except:
-                request.user.profile_picture_url = None
+            user = request.user
+            # Profile is only queried if a template actually reads the URL
+            user.profile_picture_url = SimpleLazyObject(lambda: _get_profile_picture_url(user))
         
         return None
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_auto_20250725_0616'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='navigationmenuitem',
+            index=models.Index(fields=['menu_type', 'is_active', 'order'], name='core_navmenu_type_active_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_navigationmenuitem_core_navmenu_type_active_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='faq',
+            index=models.Index(fields=['is_active', 'order'], name='faq_active_order_idx'),
+        ),
+    ]
@@ -1,9 +1,54 @@
 from django.db import models
 from django.conf import settings
+from django.urls import NoReverseMatch, reverse
+from django.utils.functional import cached_property
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from functools import lru_cache
 import base64
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
+
+# Values written by EncryptedCharField: AESGCM_PREFIX + base64(nonce + ciphertext)
+AESGCM_PREFIX = 'aesgcm$'
+AESGCM_NONCE_SIZE = 12
+
+# Older values are Fernet tokens; every one starts with the base64 of its
+# 0x80 version byte
+FERNET_TOKEN_PREFIX = b'gAAAAA'
+# ...and the oldest ones wrap the token in a second base64 layer
+LEGACY_FERNET_PREFIX = 'Z0FBQUFB'
+
+CIPHERTEXT_PREFIXES = (AESGCM_PREFIX, FERNET_TOKEN_PREFIX.decode('ascii'), LEGACY_FERNET_PREFIX)
+
+# Development fallback key, generated once per process when
+# FIELD_ENCRYPTION_KEY is not configured
+_generated_key = None
+
+
+@lru_cache(maxsize=4)
+def _get_aesgcm(key):
+    """Build (once per key) the AES-256-GCM cipher used by EncryptedCharField"""
+    # FIELD_ENCRYPTION_KEY is a Fernet key; derive a separate AES-256 key from it
+    derived_key = HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=b'EncryptedCharField AES-256-GCM',
+    ).derive(base64.urlsafe_b64decode(key))
+    return AESGCM(derived_key)
+
+
+@lru_cache(maxsize=4)
+def _get_fernet(key):
+    """Build (once per key) the Fernet instance for reading older values"""
+    return Fernet(key)
+
 
 class BaseModel(models.Model):
     """Base model with common fields for all models"""
@@ -22,42 +67,74 @@ class EncryptedCharField(models.CharField):
 
     def get_encryption_key(self):
         """Get or create encryption key"""
+        global _generated_key
         key = getattr(settings, 'FIELD_ENCRYPTION_KEY', None)
         if not key:
             # Generate a key if not exists (for development)
-            key = Fernet.generate_key()
+            if _generated_key is None:
+                _generated_key = Fernet.generate_key()
+            key = _generated_key
             # In production, this should be set in environment variables
         return key
 
     def encrypt_value(self, value):
         """Encrypt the value"""
-        if not value:
+        if not value or value.startswith(AESGCM_PREFIX):
+            # Already encrypted, e.g. a value that never went through from_db_value
             return value
 
         try:
-            key = self.get_encryption_key()
-            f = Fernet(key)
-            encrypted_value = f.encrypt(value.encode())
-            return base64.urlsafe_b64encode(encrypted_value).decode()
+            aesgcm = _get_aesgcm(self.get_encryption_key())
+            nonce = os.urandom(AESGCM_NONCE_SIZE)
+            token = nonce + aesgcm.encrypt(nonce, value.encode(), None)
+            return AESGCM_PREFIX + base64.urlsafe_b64encode(token).decode('ascii')
         except Exception:
             # If encryption fails, return original value (for backward compatibility)
             return value
 
     def decrypt_value(self, value):
         """Decrypt the value"""
-        if not value:
+        if not value or not value.startswith(CIPHERTEXT_PREFIXES):
+            # Plaintext stored before encryption was introduced
             return value
 
         try:
-            key = self.get_encryption_key()
-            f = Fernet(key)
-            decoded_value = base64.urlsafe_b64decode(value.encode())
-            decrypted_value = f.decrypt(decoded_value)
-            return decrypted_value.decode()
+            return self._decrypt_with(self.get_encryption_key(), value)
         except Exception:
             # If decryption fails, assume it's not encrypted (backward compatibility)
             return value
 
+    def bulk_decrypt(self, values):
+        """
+        Decrypt a list of stored ciphertexts with a single key lookup.
+        For raw values that bypassed from_db_value (raw SQL, backup files);
+        querysets already come back decrypted.
+        """
+        key = self.get_encryption_key()
+        decrypted = []
+        for value in values:
+            if not value or not value.startswith(CIPHERTEXT_PREFIXES):
+                decrypted.append(value)
+                continue
+            try:
+                decrypted.append(self._decrypt_with(key, value))
+            except Exception:
+                decrypted.append(value)
+        return decrypted
+
+    @staticmethod
+    def _decrypt_with(key, value):
+        if value.startswith(AESGCM_PREFIX):
+            token = base64.urlsafe_b64decode(value[len(AESGCM_PREFIX):])
+            nonce, ciphertext = token[:AESGCM_NONCE_SIZE], token[AESGCM_NONCE_SIZE:]
+            return _get_aesgcm(key).decrypt(nonce, ciphertext, None).decode()
+
+        token = value.encode('ascii')
+        if not token.startswith(FERNET_TOKEN_PREFIX):
+            # The oldest Fernet values carry an extra base64 layer
+            token = base64.urlsafe_b64decode(token)
+        return _get_fernet(key).decrypt(token).decode()
+
     def from_db_value(self, value, expression, connection):
         """Decrypt when loading from database"""
         return self.decrypt_value(value)
@@ -147,6 +224,9 @@ class SiteConfiguration(BaseModel):
     default_from_email = models.EmailField(blank=True, help_text="Default 'from' email address")
 
     is_active = models.BooleanField(default=True)
+
+    # Resolved by apply_email_settings on first use, reset on save
+    _email_overrides = None
     
     class Meta:
         verbose_name = "Site Configuration"
@@ -157,51 +237,76 @@ class SiteConfiguration(BaseModel):
     
     @classmethod
     def get_config(cls):
-        """Get the active site configuration"""
+        """
+        Get the active site configuration, fresh from the database.
+
+        Use this when the instance is going to be modified and saved; read-only
+        callers should use core.utils.cached_site_config().
+        """
         return cls.objects.filter(is_active=True).first() or cls.objects.create()
 
     def apply_email_settings(self):
         """Apply email settings to Django settings"""
         from django.conf import settings
 
+        if self._email_overrides is None:
+            self._email_overrides = self._build_email_overrides()
+
+        # An empty tuple means the SMTP configuration is incomplete
+        if not self._email_overrides:
+            return
+
+        for name, value in self._email_overrides:
+            setattr(settings, name, value)
+
+        # Apply provider-specific optimizations
+        if self.email_provider == 'zoho':
+            self._apply_zoho_optimizations()
+
+    @cached_property
+    def email_provider(self):
+        """Mail provider recognised from email_host ('gmail', 'zoho' or None)"""
+        host = (self.email_host or '').lower()
+        if host.endswith('gmail.com'):
+            return 'gmail'
+        if host.endswith('zoho.com'):
+            return 'zoho'
+        return None
+
+    def _build_email_overrides(self):
+        """Resolve the (setting, value) pairs apply_email_settings assigns"""
         # Only apply if we have a complete SMTP configuration
         if self.email_backend == 'django.core.mail.backends.smtp.EmailBackend':
             if not (self.email_host and self.email_host_user and self.email_host_password):
-                return  # Don't apply incomplete SMTP settings
+                return ()  # Don't apply incomplete SMTP settings
 
-        # Apply settings
+        overrides = []
         if self.email_backend:
-            settings.EMAIL_BACKEND = self.email_backend
+            overrides.append(('EMAIL_BACKEND', self.email_backend))
         if self.email_host:
-            settings.EMAIL_HOST = self.email_host
+            overrides.append(('EMAIL_HOST', self.email_host))
         if self.email_port:
-            settings.EMAIL_PORT = self.email_port
+            overrides.append(('EMAIL_PORT', self.email_port))
         if self.email_use_tls is not None:
-            settings.EMAIL_USE_TLS = self.email_use_tls
+            overrides.append(('EMAIL_USE_TLS', self.email_use_tls))
         if self.email_use_ssl is not None:
-            settings.EMAIL_USE_SSL = self.email_use_ssl
+            overrides.append(('EMAIL_USE_SSL', self.email_use_ssl))
         if self.email_host_user:
-            settings.EMAIL_HOST_USER = self.email_host_user
+            overrides.append(('EMAIL_HOST_USER', self.email_host_user))
         if self.email_host_password:
-            settings.EMAIL_HOST_PASSWORD = self.email_host_password
+            overrides.append(('EMAIL_HOST_PASSWORD', self.email_host_password))
         if self.default_from_email:
-            settings.DEFAULT_FROM_EMAIL = self.default_from_email
-            settings.SERVER_EMAIL = self.default_from_email
+            overrides.append(('DEFAULT_FROM_EMAIL', self.default_from_email))
+            overrides.append(('SERVER_EMAIL', self.default_from_email))
 
         # Add timeout and other settings for better reliability
-        settings.EMAIL_TIMEOUT = 30
-        settings.EMAIL_USE_LOCALTIME = True
-
-        # Apply provider-specific optimizations
-        if self.email_host and 'zoho.com' in self.email_host.lower():
-            self._apply_zoho_optimizations()
+        overrides.append(('EMAIL_TIMEOUT', 30))
+        overrides.append(('EMAIL_USE_LOCALTIME', True))
+        return tuple(overrides)
 
     def _apply_zoho_optimizations(self):
         """Apply Zoho-specific email optimizations"""
         from django.conf import settings
-        import logging
-
-        logger = logging.getLogger(__name__)
 
         # Zoho-specific timeout settings
         settings.EMAIL_TIMEOUT = 60  # Longer timeout for Zoho
@@ -216,7 +321,7 @@ class SiteConfiguration(BaseModel):
 
         # Verify port configuration
         if self.email_port not in [587, 465]:
-            logger.warning(f"Zoho typically uses port 587 (TLS) or 465 (SSL), current: {self.email_port}")
+            logger.warning("Zoho typically uses port 587 (TLS) or 465 (SSL), current: %s", self.email_port)
 
         # Ensure from email matches authenticated user for better deliverability
         if self.email_host_user and self.default_from_email:
@@ -226,6 +331,18 @@ class SiteConfiguration(BaseModel):
         logger.debug("Applied Zoho-specific optimizations")
 
 
+@lru_cache(maxsize=128)
+def _reverse_cached(url_name):
+    """reverse() for argument-less URL names, memoized per process"""
+    return reverse(url_name)
+
+
+class NavigationMenuItemManager(models.Manager):
+    def active(self):
+        """Active items in display order, with their linked service joined"""
+        return self.get_queryset().select_related('service').filter(is_active=True)
+
+
 class NavigationMenuItem(BaseModel):
     """Admin-controlled navigation menu items"""
     MENU_TYPE_CHOICES = [
@@ -257,8 +374,13 @@ class NavigationMenuItem(BaseModel):
     # Grouping for services dropdown
     group_name = models.CharField(max_length=100, blank=True, help_text="Group name for services dropdown (e.g., 'University Applications')")
 
+    objects = NavigationMenuItemManager()
+
     class Meta:
         ordering = ['menu_type', 'order', 'name']
+        indexes = [
+            models.Index(fields=['menu_type', 'is_active', 'order'], name='core_navmenu_type_active_idx'),
+        ]
         verbose_name = "Navigation Menu Item"
         verbose_name_plural = "Navigation Menu Items"
 
@@ -273,9 +395,8 @@ class NavigationMenuItem(BaseModel):
             return self.service.get_absolute_url()
         elif self.link_type == 'internal' and self.internal_url_name:
             try:
-                from django.urls import reverse
-                return reverse(self.internal_url_name)
-            except:
+                return _reverse_cached(self.internal_url_name)
+            except NoReverseMatch:
                 return '#'
         return '#'
 
@@ -289,6 +410,9 @@ class FAQ(BaseModel):
     
     class Meta:
         ordering = ['order', 'created_at']
+        indexes = [
+            models.Index(fields=['is_active', 'order'], name='faq_active_order_idx'),
+        ]
         verbose_name = "FAQ"
         verbose_name_plural = "FAQs"
     
@@ -10,6 +10,7 @@ CACHE_TIMEOUTS = {
     'service_detail': 60 * 20, # 20 minutes for individual services
     'user_dashboard': 60 * 5,  # 5 minutes for user dashboard
     'admin_data': 60 * 2,     # 2 minutes for admin data
+    'sitemap': 60 * 60,       # 1 hour for sitemap XML (also invalidated on save)
 }
 
 # Database optimization settings
@@ -32,14 +33,11 @@ STATIC_FILE_OPTIMIZATIONS = {
 
 # Media file optimization
 MEDIA_FILE_OPTIMIZATIONS = {
+    'IMAGE_PROCESSOR': 'pillow',  # 'pyvips' where pyvips and libvips are installed
     'IMAGE_QUALITY': 85,
+    'IMAGE_ADAPTIVE_QUALITY': False,  # Search the lowest visually safe quality per image
     'IMAGE_MAX_WIDTH': 1920,
     'IMAGE_MAX_HEIGHT': 1080,
-    'THUMBNAIL_SIZES': {
-        'small': (150, 150),
-        'medium': (300, 300),
-        'large': (600, 600),
-    }
 }
 
 # Security optimizations
@@ -66,55 +64,39 @@ EMAIL_OPTIMIZATIONS = {
     'EMAIL_BACKEND': 'django.core.mail.backends.smtp.EmailBackend',
 }
 
-# Logging optimization
+# Logging optimization: loggers only enqueue records; the listener in
+# core.logging_queue, started by CoreConfig.ready(), writes them to the
+# console and to BASE_DIR/logs/django.log
 LOGGING_OPTIMIZATIONS = {
     'version': 1,
     'disable_existing_loggers': False,
-    'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
-            'style': '{',
-        },
-        'simple': {
-            'format': '{levelname} {message}',
-            'style': '{',
-        },
-    },
     'handlers': {
-        'file': {
-            'level': 'INFO',
-            'class': 'logging.handlers.RotatingFileHandler',
-            'filename': 'logs/django.log',
-            'maxBytes': 1024*1024*15,  # 15MB
-            'backupCount': 10,
-            'formatter': 'verbose',
-        },
-        'console': {
-            'level': 'INFO',
-            'class': 'logging.StreamHandler',
-            'formatter': 'simple'
+        'queue': {
+            'class': 'logging.handlers.QueueHandler',
+            'queue': 'ext://core.logging_queue.log_queue',
         },
     },
     'root': {
-        'handlers': ['console', 'file'],
+        'handlers': ['queue'],
         'level': 'INFO',
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
         'django.db.backends': {
-            'handlers': ['file'],
+            'handlers': ['queue'],
             'level': 'WARNING',
             'propagate': False,
         },
     },
 }
 
-# Template optimization
+# Template optimization (APP_DIRS must be off when loaders are listed explicitly)
 TEMPLATE_OPTIMIZATIONS = {
+    'APP_DIRS': False,
     'OPTIONS': {
         'context_processors': [
             'django.template.context_processors.debug',
@@ -159,8 +141,22 @@ URL_OPTIMIZATIONS = {
     'PREPEND_WWW': False,
 }
 
+# Plain setting overrides applied by apply_optimizations in one update
+_FLAT_OPTIMIZATIONS = {
+    **STATIC_FILE_OPTIMIZATIONS,
+    'IMAGE_PROCESSOR': MEDIA_FILE_OPTIMIZATIONS['IMAGE_PROCESSOR'],
+    **SECURITY_OPTIMIZATIONS,
+    **SESSION_OPTIMIZATIONS,
+    **EMAIL_OPTIMIZATIONS,
+    **FILE_UPLOAD_OPTIMIZATIONS,
+    **URL_OPTIMIZATIONS,
+}
+
 def apply_optimizations(settings_module):
     """Apply all optimizations to Django settings"""
+    # Settings modules can be re-executed (e.g. by test runners); apply once
+    if getattr(settings_module, '_optimizations_applied', False):
+        return
     
     # Apply cache settings
     if hasattr(settings_module, 'CACHES'):
@@ -171,29 +167,8 @@ def apply_optimizations(settings_module):
         for db_config in settings_module.DATABASES.values():
             db_config.update(DATABASE_OPTIMIZATIONS)
     
-    # Apply static file optimizations
-    for key, value in STATIC_FILE_OPTIMIZATIONS.items():
-        setattr(settings_module, key, value)
-    
-    # Apply security optimizations
-    for key, value in SECURITY_OPTIMIZATIONS.items():
-        setattr(settings_module, key, value)
-    
-    # Apply session optimizations
-    for key, value in SESSION_OPTIMIZATIONS.items():
-        setattr(settings_module, key, value)
-    
-    # Apply email optimizations
-    for key, value in EMAIL_OPTIMIZATIONS.items():
-        setattr(settings_module, key, value)
-    
-    # Apply file upload optimizations
-    for key, value in FILE_UPLOAD_OPTIMIZATIONS.items():
-        setattr(settings_module, key, value)
-    
-    # Apply URL optimizations
-    for key, value in URL_OPTIMIZATIONS.items():
-        setattr(settings_module, key, value)
+    # Apply static file, image processor, security, session, email, file upload and URL optimizations
+    vars(settings_module).update(_FLAT_OPTIMIZATIONS)
     
     # Apply middleware optimization
     settings_module.MIDDLEWARE = OPTIMIZED_MIDDLEWARE
@@ -204,22 +179,79 @@ def apply_optimizations(settings_module):
     
     # Apply logging optimization
     settings_module.LOGGING = LOGGING_OPTIMIZATIONS
+    
+    settings_module._optimizations_applied = True
 
 # Performance monitoring utilities
+_process = None
+
+def _get_process():
+    """psutil handle for this process, created on first use"""
+    global _process
+    if _process is None:
+        import psutil
+        import os
+        _process = psutil.Process(os.getpid())
+    return _process
+
+def _memory_usage_mb():
+    """Peak resident memory of this process in MB"""
+    try:
+        import resource
+    except ImportError:
+        # No resource module on Windows; fall back to psutil
+        return _get_process().memory_info().rss / 1024 / 1024
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+_redis_client = None
+
+def _get_redis_client(cache):
+    """Redis connection behind the default cache, or None for other backends"""
+    global _redis_client
+    if _redis_client is None:
+        if hasattr(cache, 'client') and hasattr(cache.client, 'get_client'):
+            # django-redis
+            _redis_client = cache.client.get_client()
+        elif hasattr(cache, '_cache') and hasattr(cache._cache, 'get_client'):
+            # Django's built-in RedisCache
+            _redis_client = cache._cache.get_client()
+        else:
+            _redis_client = False
+    return _redis_client or None
+
+def _cache_stats(cache):
+    """Server-side hit/miss counters; empty when the backend doesn't keep any"""
+    client = _get_redis_client(cache)
+    if client is None:
+        return {}
+    # Only reached with a Redis client, so the redis package is installed
+    from redis.exceptions import RedisError
+    try:
+        info = client.info('stats')
+    except (RedisError, OSError):
+        # Redis unreachable; report the other metrics without the counters
+        return {}
+    return {
+        'cache_hits': info['keyspace_hits'],
+        'cache_misses': info['keyspace_misses'],
+    }
+
 def get_performance_metrics():
     """Get current performance metrics"""
     from django.db import connection
     from django.core.cache import cache
     import psutil
-    import os
     
     metrics = {
-        'database_queries': len(connection.queries),
-        'cache_hits': getattr(cache, '_cache_hits', 0),
-        'cache_misses': getattr(cache, '_cache_misses', 0),
-        'memory_usage': psutil.Process(os.getpid()).memory_info().rss / 1024 / 1024,  # MB
-        'cpu_usage': psutil.cpu_percent(),
+        # queries_log is a bounded deque; only filled when query logging is on
+        'database_queries': len(connection.queries_log) if connection.queries_logged else None,
+        'memory_usage': _memory_usage_mb(),  # MB
+        # Non-blocking: system CPU usage since the previous call
+        'cpu_usage': psutil.cpu_percent(interval=None),
     }
+    # Only Redis reports hit/miss counts; other backends leave the keys out
+    metrics.update(_cache_stats(cache))
     
     return metrics
 
@@ -3,7 +3,7 @@ SEO Configuration Settings for Edunox GH
 Professional SEO settings for global market competition
 """
 
-# Core SEO Settings
+# Core SEO Settings (keyword and location collections are read-only tuples)
 SEO_SETTINGS = {
     # Site Information
     'SITE_NAME': 'Edunox GH',
@@ -11,7 +11,7 @@ SEO_SETTINGS = {
     'SITE_DESCRIPTION': 'Edunox Ghana empowers underserved students in Ghana with access to free and affordable university education through outreach, digital literacy support, and educational consultancy in Ghana. We help students in Ghana apply to University of the People and other affordable higher education institutions. Edunox GH is dedicated to supporting students in Ghana.',
     
     # Primary Keywords (for global competition)
-    'PRIMARY_KEYWORDS': [
+    'PRIMARY_KEYWORDS': (
         'Edunox Ghana',
         'Edunox GH',
         'Edunox',
@@ -28,10 +28,10 @@ SEO_SETTINGS = {
         'Ghana education support',
         'study in Ghana',
         'Ghanaian education'
-    ],
+    ),
     
     # Long-tail Keywords
-    'LONG_TAIL_KEYWORDS': [
+    'LONG_TAIL_KEYWORDS': (
         'how to apply to University of the People from Ghana',
         'free university education opportunities in Ghana',
         'scholarship opportunities for Ghanaian students',
@@ -48,10 +48,10 @@ SEO_SETTINGS = {
         'Edunox GH contact',
         'Edunox services',
         'Edunox GH services'
-    ],
+    ),
     
     # Geographic Targeting
-    'TARGET_LOCATIONS': [
+    'TARGET_LOCATIONS': (
         'Ghana',
         'Accra',
         'Kumasi',
@@ -62,10 +62,10 @@ SEO_SETTINGS = {
         'Koforidua',
         'Sunyani',
         'Wa'
-    ],
+    ),
     
     # Competitor Analysis Keywords
-    'COMPETITOR_KEYWORDS': [
+    'COMPETITOR_KEYWORDS': (
         'Ghana education portal',
         'university admission Ghana',
         'scholarship portal Ghana',
@@ -74,28 +74,28 @@ SEO_SETTINGS = {
         'higher education Ghana',
         'university guidance Ghana',
         'education support Ghana'
-    ],
+    ),
     
     # Content Categories for SEO
     'CONTENT_CATEGORIES': {
         'university_applications': {
             'title': 'University Applications',
-            'keywords': ['university application', 'admission process', 'application requirements'],
+            'keywords': ('university application', 'admission process', 'application requirements'),
             'description': 'Complete guide to university applications in Ghana and abroad'
         },
         'scholarships': {
             'title': 'Scholarships & Financial Aid',
-            'keywords': ['scholarship', 'financial aid', 'education funding'],
+            'keywords': ('scholarship', 'financial aid', 'education funding'),
             'description': 'Find and apply for scholarships and financial aid opportunities'
         },
         'digital_literacy': {
             'title': 'Digital Literacy Training',
-            'keywords': ['digital skills', 'computer training', 'online learning'],
+            'keywords': ('digital skills', 'computer training', 'online learning'),
             'description': 'Essential digital skills for modern education and career success'
         },
         'career_guidance': {
             'title': 'Career Guidance',
-            'keywords': ['career advice', 'job opportunities', 'professional development'],
+            'keywords': ('career advice', 'job opportunities', 'professional development'),
             'description': 'Professional career guidance and development resources'
         }
     },
@@ -194,7 +194,7 @@ SEO_SETTINGS = {
     # International SEO
     'INTERNATIONAL_SEO': {
         'default_language': 'en',
-        'supported_languages': ['en'],  # Can expand to include local languages
+        'supported_languages': ('en',),  # Can expand to include local languages
         'hreflang_enabled': False,  # Enable when adding multiple languages
         'geo_targeting': 'GH'  # Ghana
     }
@@ -228,6 +228,17 @@ META_TEMPLATES = {
     }
 }
 
+# Bound str.format_map of every META_TEMPLATES string, looked up once at import
+_META_FORMATTERS = {
+    page_type: {field: template.format_map for field, template in fields.items()}
+    for page_type, fields in META_TEMPLATES.items()
+}
+
+
+def render_meta_template(page_type, context):
+    """Fill in the META_TEMPLATES entry for page_type (title, description, keywords)"""
+    return {field: format_map(context) for field, format_map in _META_FORMATTERS[page_type].items()}
+
 # Rich Snippets Configuration
 RICH_SNIPPETS = {
     'organization': True,
@@ -0,0 +1,53 @@
+from django.contrib.sites.models import Site
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import SiteConfiguration
+from .middleware import reset_config_cache
+from resources.models import Resource, ResourceCategory
+from services.models import Service, ServiceCategory
+from .seo_utils import get_seo_manager
+from .sitemaps import invalidate_sitemap_cache
+from .utils import clear_site_config_cache
+
+
+@receiver(post_save, sender=SiteConfiguration)
+@receiver(post_delete, sender=SiteConfiguration)
+def invalidate_site_configuration_cache(sender, instance, **kwargs):
+    """Make middlewares and template helpers pick up the saved configuration"""
+    instance._email_overrides = None
+    instance.__dict__.pop('email_provider', None)
+    clear_site_config_cache()
+    reset_config_cache()
+
+
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+def invalidate_seo_manager(sender, **kwargs):
+    """Rebuild the shared SEOManager and stored JSON-LD so they pick up the new site URL"""
+    get_seo_manager.cache_clear()
+    seo_manager = get_seo_manager()
+    seo_manager.rebuild_service_structured_data(Service.objects.all())
+    seo_manager.rebuild_article_structured_data(Resource.objects.all())
+
+
+@receiver(post_save, sender=ServiceCategory)
+def rebuild_service_structured_data(sender, instance, **kwargs):
+    """Services embed their category name in the stored JSON-LD"""
+    get_seo_manager().rebuild_service_structured_data(instance.services.all())
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=ServiceCategory)
+@receiver(post_delete, sender=ServiceCategory)
+@receiver(post_save, sender=Resource)
+@receiver(post_delete, sender=Resource)
+@receiver(post_save, sender=ResourceCategory)
+@receiver(post_delete, sender=ResourceCategory)
+def invalidate_sitemaps(sender, update_fields=None, **kwargs):
+    """Drop cached sitemap pages when the objects they list change"""
+    # Resource.increment_views() saves on every page view without touching
+    # anything a sitemap shows
+    if update_fields and set(update_fields) <= {'views_count'}:
+        return
+    invalidate_sitemap_cache()
@@ -1,13 +1,57 @@
 """
 SEO Sitemaps for EduBridge Ghana
 Generates XML sitemaps for better search engine indexing
+
+Items only load the columns the sitemaps read (pk for location, updated_at
+for lastmod).
 """
 
+import time
+from functools import lru_cache
+from itertools import islice
+
 from django.contrib.sitemaps import Sitemap
+from django.contrib.sitemaps.views import x_robots_tag
+from django.contrib.sites.shortcuts import get_current_site
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, PageNotAnInteger
+from django.db.models import CharField, Max, QuerySet, Value
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.functional import cached_property
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.html import escape
 from datetime import timedelta
 
+from .optimization import CACHE_TIMEOUTS
+from .seo_utils import resource_detail_url, service_detail_url
+
+
+STATIC_LASTMOD_CACHE_KEY = 'sitemap_static_lastmod'
+# Bumped (deleted) whenever sitemap content changes; part of every page's cache key
+SITEMAP_VERSION_KEY = 'sitemap_version'
+
+
+def _latest_content_change():
+    """Most recent updated_at across the models the static pages display"""
+    from services.models import Service
+    from resources.models import Resource
+    from .models import FAQ, SiteConfiguration
+
+    dates = [
+        model.objects.aggregate(latest=Max('updated_at'))['latest']
+        for model in (SiteConfiguration, FAQ, Service, Resource)
+    ]
+    dates = [date for date in dates if date]
+    return max(dates) if dates else None
+
+
+@lru_cache(maxsize=None)
+def _reverse_static(url_name):
+    """reverse() for the fixed StaticViewSitemap names, resolved once per process"""
+    return reverse(url_name)
+
 
 class StaticViewSitemap(Sitemap):
     """Sitemap for static pages"""
@@ -26,10 +70,19 @@ class StaticViewSitemap(Sitemap):
         ]
 
     def location(self, item):
-        return reverse(item)
+        return _reverse_static(item)
+
+    @cached_property
+    def _lastmod(self):
+        # A stable date lets crawlers rely on <lastmod> (here and in the
+        # sitemap index) instead of seeing every static page as changed on
+        # each fetch
+        return cache.get_or_set(
+            STATIC_LASTMOD_CACHE_KEY, _latest_content_change, CACHE_TIMEOUTS['static_pages']
+        )
 
     def lastmod(self, item):
-        return timezone.now()
+        return self._lastmod
 
 
 class ServiceSitemap(Sitemap):
@@ -39,13 +92,13 @@ class ServiceSitemap(Sitemap):
 
     def items(self):
         from services.models import Service
-        return Service.objects.filter(is_active=True)
+        return Service.objects.filter(is_active=True).only('pk', 'updated_at')
 
     def lastmod(self, obj):
         return obj.updated_at
 
     def location(self, obj):
-        return reverse('services:detail', args=[obj.pk])
+        return service_detail_url(obj.pk)
 
 
 class ServiceCategorySitemap(Sitemap):
@@ -55,7 +108,7 @@ class ServiceCategorySitemap(Sitemap):
 
     def items(self):
         from services.models import ServiceCategory
-        return ServiceCategory.objects.filter(is_active=True)
+        return ServiceCategory.objects.filter(is_active=True).only('pk', 'updated_at')
 
     def lastmod(self, obj):
         return obj.updated_at
@@ -71,13 +124,13 @@ class ResourceSitemap(Sitemap):
 
     def items(self):
         from resources.models import Resource
-        return Resource.objects.filter(is_published=True)
+        return Resource.objects.filter(is_published=True).only('pk', 'updated_at')
 
     def lastmod(self, obj):
         return obj.updated_at
 
     def location(self, obj):
-        return reverse('resources:detail', args=[obj.pk])
+        return resource_detail_url(obj.pk)
 
 
 class ResourceCategorySitemap(Sitemap):
@@ -87,7 +140,7 @@ class ResourceCategorySitemap(Sitemap):
 
     def items(self):
         from resources.models import ResourceCategory
-        return ResourceCategory.objects.filter(is_active=True)
+        return ResourceCategory.objects.filter(is_active=True).only('pk', 'updated_at')
 
     def lastmod(self, obj):
         return obj.updated_at
@@ -112,13 +165,13 @@ class NewsSitemap(Sitemap):
             is_published=True,
             resource_type='ARTICLE',
             published_at__gte=recent_date
-        ).order_by('-published_at')
+        ).order_by('-published_at').only('pk', 'updated_at')
 
     def lastmod(self, obj):
         return obj.updated_at
 
     def location(self, obj):
-        return reverse('resources:detail', args=[obj.pk])
+        return resource_detail_url(obj.pk)
 
 
 class ImageSitemap(Sitemap):
@@ -126,32 +179,35 @@ class ImageSitemap(Sitemap):
     changefreq = 'weekly'
     priority = 0.5
 
+    # Detail page URL for each kind of item
+    detail_urls = {
+        'service': service_detail_url,
+        'resource': resource_detail_url,
+    }
+
     def items(self):
         from services.models import Service
         from resources.models import Resource
 
-        items = []
-        # Add service images
-        for service in Service.objects.filter(is_active=True, image__isnull=False):
-            items.append(('service', service))
+        # Services and resources with images, as one UNION query of
+        # {'pk', 'updated_at', 'kind'} rows
+        service_images = Service.objects.filter(
+            is_active=True, image__isnull=False
+        ).annotate(kind=Value('service', output_field=CharField())).values('pk', 'updated_at', 'kind').order_by()
+        resource_images = Resource.objects.filter(
+            is_published=True, featured_image__isnull=False
+        ).annotate(kind=Value('resource', output_field=CharField())).values('pk', 'updated_at', 'kind').order_by()
 
-        # Add resource images
-        for resource in Resource.objects.filter(is_published=True, featured_image__isnull=False):
-            items.append(('resource', resource))
-
-        return items
+        return service_images.union(resource_images, all=True).order_by('-kind', 'pk')
 
     def location(self, item):
-        item_type, obj = item
-        if item_type == 'service':
-            return reverse('services:detail', args=[obj.pk])
-        elif item_type == 'resource':
-            return reverse('resources:detail', args=[obj.pk])
-        return '/'
+        detail_url = self.detail_urls.get(item['kind'])
+        if detail_url is None:
+            return '/'
+        return detail_url(item['pk'])
 
     def lastmod(self, item):
-        item_type, obj = item
-        return obj.updated_at
+        return item['updated_at']
 
 
 # Sitemap index with enhanced organization
@@ -164,3 +220,134 @@ sitemaps = {
     'news': NewsSitemap,
     'images': ImageSitemap,
 }
+
+
+# XML for a sitemap section, matching django.contrib.sitemaps' sitemap.xml
+# template but built with plain string formatting
+SITEMAP_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+    'xmlns:xhtml="http://www.w3.org/1999/xhtml">\n'
+)
+SITEMAP_FOOTER = '\n</urlset>\n'
+
+# Rows fetched per database round-trip, and <url> elements per written chunk
+SITEMAP_CHUNK_SIZE = 500
+
+
+def render_url(url):
+    """<url> element for one entry of Sitemap.get_urls()"""
+    parts = ['<url><loc>', escape(url['location']), '</loc>']
+    if url.get('lastmod'):
+        lastmod = timezone.template_localtime(url['lastmod'])
+        parts.append(f"<lastmod>{lastmod.strftime('%Y-%m-%d')}</lastmod>")
+    if url.get('changefreq'):
+        parts.append(f"<changefreq>{escape(url['changefreq'])}</changefreq>")
+    if url.get('priority'):
+        parts.append(f"<priority>{escape(url['priority'])}</priority>")
+    for alternate in url.get('alternates') or ():
+        parts.append(
+            f'<xhtml:link rel="alternate" hreflang="{escape(alternate["lang_code"])}" '
+            f'href="{escape(alternate["location"])}"/>'
+        )
+    parts.append('</url>')
+    return ''.join(parts)
+
+
+def iter_urls(site, object_list, protocol, domain):
+    """
+    Sitemap._urls() as a generator, reading querysets in chunks.
+
+    Uses the same private Sitemap._get()/_location() helpers as _urls();
+    SitemapTestCase checks the output still matches Django's sitemap view.
+    """
+    if isinstance(object_list, QuerySet):
+        object_list = object_list.iterator(chunk_size=SITEMAP_CHUNK_SIZE)
+    for item in object_list:
+        priority = site._get('priority', item)
+        yield {
+            'location': f"{protocol}://{domain}{site._location(item)}",
+            'lastmod': site._get('lastmod', item),
+            'changefreq': site._get('changefreq', item),
+            'priority': str(priority if priority is not None else ''),
+        }
+
+
+def stream_urlset(sections, protocol, domain):
+    """Yield the urlset document a chunk of <url> elements at a time"""
+    yield SITEMAP_HEADER
+    for site, object_list in sections:
+        urls = map(render_url, iter_urls(
+            site, object_list, site.get_protocol(protocol), site.get_domain(domain)
+        ))
+        while chunk := ''.join(islice(urls, SITEMAP_CHUNK_SIZE)):
+            yield chunk
+    yield SITEMAP_FOOTER
+
+
+def sitemap_cache_key(section, page, protocol, domain):
+    """Cache key for one rendered sitemap page under the current sitemap version"""
+    version = cache.get_or_set(SITEMAP_VERSION_KEY, time.time_ns, None)
+    return f"sitemap_{version}_{section or 'all'}_{page}_{protocol}_{domain}"
+
+
+def invalidate_sitemap_cache():
+    """Start a new sitemap version; pages cached under the old one are never read again"""
+    cache.delete_many([SITEMAP_VERSION_KEY, STATIC_LASTMOD_CACHE_KEY])
+
+
+def _cache_stream(chunks, key):
+    """Pass chunks through, caching the whole document once the last one is sent"""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    cache.set(key, ''.join(parts), CACHE_TIMEOUTS['sitemap'])
+
+
+@x_robots_tag
+def sitemap(request, sitemaps, section=None, content_type='application/xml'):
+    """
+    Streaming replacement for django.contrib.sitemaps.views.sitemap.
+
+    Pages are resolved up front so missing sections and bad page numbers
+    still 404; the <url> elements are then written while the rows are read.
+    No Last-Modified header is sent, as it is only known after the last row.
+
+    Rendered pages are cached until a sitemap model is saved (see
+    core.signals) and marked cacheable for CACHE_TIMEOUTS['sitemap'].
+    """
+    if section is not None:
+        if section not in sitemaps:
+            raise Http404("No sitemap available for section: %r" % section)
+        maps = [sitemaps[section]]
+    else:
+        maps = sitemaps.values()
+    page = request.GET.get('p', 1)
+
+    protocol = request.scheme
+    req_site = get_current_site(request)
+    # Only well-formed page numbers are cached; anything else 404s below
+    cache_key = sitemap_cache_key(section, page, protocol, req_site.domain) if str(page).isdigit() else None
+    content = cache.get(cache_key) if cache_key else None
+    if content is not None:
+        response = HttpResponse(content, content_type=content_type)
+    else:
+        sections = []
+        for site in maps:
+            if callable(site):
+                site = site()
+            try:
+                sections.append((site, site.paginator.page(page).object_list))
+            except EmptyPage:
+                raise Http404("Page %s empty" % page)
+            except PageNotAnInteger:
+                raise Http404("No page '%s'" % page)
+
+        chunks = stream_urlset(sections, protocol, req_site)
+        if cache_key:
+            chunks = _cache_stream(chunks, cache_key)
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+
+    patch_cache_control(response, public=True, max_age=CACHE_TIMEOUTS['sitemap'])
+    return response
@@ -3,18 +3,145 @@ ImageKit Storage Backend for Edunox GH
 Handles file uploads to ImageKit CDN for both development and production
 """
 
+from django.core.exceptions import SuspiciousFileOperation
 from django.core.files.storage import Storage
 from django.core.files.base import ContentFile
 from django.conf import settings
 from django.utils.deconstruct import deconstructible
 from imagekitio import ImageKit
+from imagekitio.utils.utils import general_api_throw_exception
+from requests import Session
+from requests.adapters import HTTPAdapter
+from requests_toolbelt import MultipartEncoder
+from urllib3.util.retry import Retry
 import uuid
 import logging
 import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 from urllib.parse import urljoin
 
+try:
+    import magic
+    _magic = magic.Magic(mime=True)
+except ImportError:  # python-magic, or the libmagic library it wraps, is missing
+    _magic = None
+
 logger = logging.getLogger(__name__)
 
+# Options common to every upload; the folder is added per file. The SDK
+# rewrites the options object it receives, so one is built per upload.
+UPLOAD_OPTIONS = MappingProxyType({'use_unique_file_name': True})
+# The same options as form fields, for uploads posted without the SDK
+UPLOAD_FIELDS = MappingProxyType({'useUniqueFileName': 'true'})
+UPLOAD_URL = 'https://upload.imagekit.io/api/v1/files/upload'
+# (connect, read) seconds for upload posts; the read timeout is the longest
+# ImageKit may stall between bytes, not a cap on the whole upload
+UPLOAD_TIMEOUT = (10, 60)
+
+# Uploads ImageKitStorage._save_many() runs at once; override with the
+# IMAGEKIT_UPLOAD_CONCURRENCY setting
+UPLOAD_CONCURRENCY = 10
+
+# Extensions stored as images, and the ImageKit folder for each known extension
+IMAGE_EXTENSIONS = frozenset({'jpg', 'jpeg', 'png', 'gif', 'webp', 'svg'})
+DOCUMENT_EXTENSIONS = frozenset({'pdf', 'doc', 'docx', 'txt', 'rtf'})
+EXTENSION_FOLDERS = {
+    **dict.fromkeys(IMAGE_EXTENSIONS, "/edunox/images/"),
+    **dict.fromkeys(DOCUMENT_EXTENSIONS, "/edunox/documents/"),
+}
+
+
+# Folders for the content types libmagic reports for the extensions above
+MIME_FOLDERS = {
+    **dict.fromkeys(
+        ('image/jpeg', 'image/png', 'image/gif', 'image/webp', 'image/svg+xml'),
+        "/edunox/images/"
+    ),
+    **dict.fromkeys(
+        ('application/pdf', 'application/msword',
+         'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+         'text/plain', 'text/rtf', 'application/rtf'),
+        "/edunox/documents/"
+    ),
+}
+
+# Bytes read from the start of a file to detect its type
+SNIFF_BYTES = 2048
+
+
+def sniff_mime(content):
+    """
+    Content type libmagic detects from the start of content, or None when
+    python-magic isn't installed. Kept on the file object so the folder choice
+    and the upload share one read.
+    """
+    if _magic is None:
+        return None
+    mime = getattr(content, '_sniffed_mime', False)
+    if mime is False:
+        content.seek(0)
+        head = content.read(SNIFF_BYTES)
+        content.seek(0)
+        mime = _magic.from_buffer(head) if head else None
+        content._sniffed_mime = mime
+    return mime
+
+
+def _extension(lower_name):
+    """Extension of an already-lowercased file name, or '' when it has none"""
+    _, dot, ext = lower_name.rpartition('.')
+    return ext if dot else ''
+
+
+# Seconds a browser upload signature from core.views.imagekit_auth_token stays valid
+DIRECT_UPLOAD_EXPIRY = 600
+
+_imagekit_client = None
+_imagekit_sessions = threading.local()
+
+
+def get_imagekit_session():
+    """
+    Keep-alive session for ImageKit requests made from the current thread.
+    requests.Session isn't thread-safe, so threaded workers get one each.
+    """
+    session = getattr(_imagekit_sessions, 'session', None)
+    if session is None:
+        session = Session()
+        session.mount('https://', HTTPAdapter(
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504)),
+        ))
+        _imagekit_sessions.session = session
+    return session
+
+
+def _session_request(*args, **kwargs):
+    """Stand-in for ImageKitRequest.request that reuses the thread's session"""
+    return get_imagekit_session().request(*args, **kwargs)
+
+
+def get_imagekit_client():
+    """
+    ImageKit client shared by every storage instance, with its requests
+    going through the calling thread's keep-alive session.
+    """
+    global _imagekit_client
+    if _imagekit_client is None:
+        client = ImageKit(
+            private_key=settings.IMAGEKIT_PRIVATE_KEY,
+            public_key=settings.IMAGEKIT_PUBLIC_KEY,
+            url_endpoint=settings.IMAGEKIT_URL_ENDPOINT
+        )
+        # The SDK sends everything through ImageKitRequest.request, a static
+        # wrapper around requests.request() that opens a new connection (and
+        # TLS handshake) per call; route it through a session instead
+        client.ik_request.request = _session_request
+        _imagekit_client = client
+    return _imagekit_client
+
+
 @deconstructible
 class ImageKitStorage(Storage):
     """
@@ -32,11 +159,7 @@ class ImageKitStorage(Storage):
             ]):
                 raise ValueError("ImageKit credentials not properly configured")
 
-            self.imagekit = ImageKit(
-                private_key=settings.IMAGEKIT_PRIVATE_KEY,
-                public_key=settings.IMAGEKIT_PUBLIC_KEY,
-                url_endpoint=settings.IMAGEKIT_URL_ENDPOINT
-            )
+            self.imagekit = get_imagekit_client()
             logger.info("ImageKit storage initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize ImageKit: {e}")
@@ -60,18 +183,16 @@ class ImageKitStorage(Storage):
             # Create unique file ID
             file_id = f"{uuid.uuid4()}.{file_extension}" if file_extension else str(uuid.uuid4())
             
-            # Determine folder based on file type
-            folder = self._get_folder_by_type(name)
+            # Determine folder from the file's content when libmagic recognises
+            # it, otherwise from its name
+            sniffed_mime = sniff_mime(content)
+            folder = MIME_FOLDERS.get(sniffed_mime) or self._get_folder_by_type(name)
             
-            # Read file content
-            content.seek(0)
-            file_content = content.read()
-
-            # Convert to base64 data URL for proper ImageKit upload
-            import base64
-
             # Detect MIME type
-            mime_type, _ = mimetypes.guess_type(name)
+            if sniffed_mime in MIME_FOLDERS:
+                mime_type = sniffed_mime
+            else:
+                mime_type, _ = mimetypes.guess_type(name)
             if not mime_type:
                 # Default to appropriate type based on file extension
                 if name.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg')):
@@ -82,66 +203,36 @@ class ImageKitStorage(Storage):
                 else:
                     mime_type = "application/octet-stream"
 
-            # Encode as base64 data URL for images, raw bytes for other files
-            if mime_type.startswith('image/'):
-                file_base64 = base64.b64encode(file_content).decode('utf-8')
-                upload_data = f"data:{mime_type};base64,{file_base64}"
-            else:
-                upload_data = file_content
+            # Stream the file to ImageKit's upload API. imagekitio's
+            # upload_file() can't be used for this: it reads the whole
+            # multipart body into memory before posting it.
+            content.seek(0)
+            upload_body = MultipartEncoder(fields={
+                'file': (file_id, content, mime_type),
+                'fileName': file_id,
+                'folder': folder,
+                **UPLOAD_FIELDS,
+            })
+            headers = self.imagekit.ik_request.create_headers()
+            headers['Content-Type'] = upload_body.content_type
+            upload_response = get_imagekit_session().post(
+                UPLOAD_URL, data=upload_body, headers=headers, timeout=UPLOAD_TIMEOUT
+            )
+            if upload_response.status_code != 200:
+                logger.error(f"ImageKit upload failed with status code {upload_response.status_code}")
+                # Raise the same exception types as the SDK's upload_file()
+                general_api_throw_exception(upload_response)
 
-            # Upload to ImageKit using proper SDK format
-            try:
-                from imagekitio.models.UploadFileRequestOptions import UploadFileRequestOptions
-
-                options = UploadFileRequestOptions(
-                    folder=folder,
-                    use_unique_file_name=True,
-                )
-
-                upload_response = self.imagekit.upload_file(
-                    file=upload_data,
-                    file_name=file_id,
-                    options=options
-                )
-            except ImportError:
-                # Fallback for older SDK versions
-                upload_response = self.imagekit.upload_file(
-                    file=file_content,
-                    file_name=file_id
-                )
-
-            # Handle different response formats from ImageKit SDK
+            # Work out the stored path from the upload response
             try:
-                if hasattr(upload_response, 'response_metadata') and upload_response.response_metadata.http_status_code == 200:
-                    # Try to get the uploaded file path (includes folder structure)
-                    if hasattr(upload_response, 'file_path'):
-                        # Use file_path which includes the folder structure
-                        uploaded_path = upload_response.file_path.lstrip('/')
-                        logger.info(f"Successfully uploaded file: {uploaded_path}")
-                        return uploaded_path
-                    elif hasattr(upload_response, 'name'):
-                        # Fallback to name and construct path
-                        uploaded_name = upload_response.name
-                        uploaded_path = f"{folder.strip('/')}/{uploaded_name}".lstrip('/')
-                        logger.info(f"Successfully uploaded file: {uploaded_path}")
-                        return uploaded_path
-                    elif hasattr(upload_response, 'response_metadata') and hasattr(upload_response.response_metadata, 'raw'):
-                        raw_data = upload_response.response_metadata.raw
-                        if 'filePath' in raw_data:
-                            uploaded_path = raw_data['filePath'].lstrip('/')
-                        else:
-                            uploaded_name = raw_data.get('name', file_id)
-                            uploaded_path = f"{folder.strip('/')}/{uploaded_name}".lstrip('/')
-                        logger.info(f"Successfully uploaded file: {uploaded_path}")
-                        return uploaded_path
-                    else:
-                        # Construct path manually
-                        uploaded_path = f"{folder.strip('/')}/{file_id}".lstrip('/')
-                        logger.info(f"Successfully uploaded file: {uploaded_path}")
-                        return uploaded_path
+                raw_data = upload_response.json()
+                if 'filePath' in raw_data:
+                    uploaded_path = raw_data['filePath'].lstrip('/')
                 else:
-                    logger.error(f"ImageKit upload failed with status code")
-                    raise Exception("Failed to upload to ImageKit")
+                    uploaded_name = raw_data.get('name', file_id)
+                    uploaded_path = f"{folder.strip('/')}/{uploaded_name}".lstrip('/')
+                logger.info(f"Successfully uploaded file: {uploaded_path}")
+                return uploaded_path
             except Exception as response_error:
                 logger.error(f"Error processing ImageKit response: {response_error}")
                 # If we can't process the response but upload might have succeeded,
@@ -163,32 +254,78 @@ class ImageKitStorage(Storage):
                     raise e
             raise
     
+    def _save_many(self, pairs):
+        """
+        Upload several files concurrently.
+        pairs is an iterable of (name, content); returns the stored names in the same order.
+        """
+        pairs = list(pairs)
+        if len(pairs) < 2:
+            return [self._save(name, content) for name, content in pairs]
+
+        # Each worker thread posts through its own session (see
+        # get_imagekit_session); the shared client only builds auth headers
+        concurrency = getattr(settings, 'IMAGEKIT_UPLOAD_CONCURRENCY', UPLOAD_CONCURRENCY)
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(pairs))) as executor:
+            return list(executor.map(lambda pair: self._save(*pair), pairs))
+
+    def save_from_url(self, name, url):
+        """
+        Have ImageKit fetch a public URL directly and store it under name's folder.
+        The file bytes never pass through this process. Returns the stored path.
+        """
+        from imagekitio.models.UploadFileRequestOptions import UploadFileRequestOptions
+
+        folder = self._get_folder_by_type(name)
+        upload_response = self.imagekit.upload_file(
+            file=url,
+            file_name=name,
+            options=UploadFileRequestOptions(folder=folder, **UPLOAD_OPTIONS)
+        )
+
+        file_path = getattr(upload_response, 'file_path', None)
+        if not file_path:
+            raise Exception("ImageKit did not return a file path for the remote upload")
+
+        uploaded_path = file_path.lstrip('/')
+        logger.info(f"Successfully uploaded remote file: {uploaded_path}")
+        return uploaded_path
+
+    def save_from_uploaded_reference(self, name, file_id, url):
+        """
+        Record a file the browser uploaded straight to ImageKit (signed by
+        core.views.imagekit_auth_token). Nothing is uploaded from here;
+        returns the stored path for url().
+        """
+        base_url = f"{settings.IMAGEKIT_URL_ENDPOINT.rstrip('/')}/"
+        if not url.startswith(base_url):
+            raise SuspiciousFileOperation(f"Uploaded file URL is outside the ImageKit endpoint: {url}")
+
+        uploaded_path = url[len(base_url):]
+        logger.info(f"Recorded direct upload {file_id} for {name}: {uploaded_path}")
+        return uploaded_path
+
     def _get_folder_by_type(self, filename):
         """
         Determine ImageKit folder based on file type
         """
-        # Get file extension
-        ext = filename.lower().split('.')[-1] if '.' in filename else ''
-        
-        # Image files
-        if ext in ['jpg', 'jpeg', 'png', 'gif', 'webp', 'svg']:
-            return "/edunox/images/"
+        lower_name = filename.lower()
         
-        # Document files
-        elif ext in ['pdf', 'doc', 'docx', 'txt', 'rtf']:
-            return "/edunox/documents/"
+        # Image and document files
+        folder = EXTENSION_FOLDERS.get(_extension(lower_name))
+        if folder:
+            return folder
         
         # Profile pictures
-        elif 'profile' in filename.lower():
+        if 'profile' in lower_name:
             return "/edunox/profiles/"
         
         # Service images
-        elif 'service' in filename.lower():
+        if 'service' in lower_name:
             return "/edunox/services/"
         
         # Default folder
-        else:
-            return "/edunox/uploads/"
+        return "/edunox/uploads/"
     
     def exists(self, name):
         """
@@ -284,8 +421,7 @@ class HybridStorage(Storage):
         """Check if file is an image"""
         if not name:
             return False
-        ext = name.lower().split('.')[-1] if '.' in name else ''
-        return ext in ['jpg', 'jpeg', 'png', 'gif', 'webp', 'svg']
+        return _extension(name.lower()) in IMAGE_EXTENSIONS
     
     def _save(self, name, content):
         """Route to appropriate storage based on file type"""
@@ -314,3 +450,30 @@ class HybridStorage(Storage):
             return self.imagekit_storage.delete(name)
         else:
             return self.local_storage.delete(name)
+
+
+def save_field_files(field_files):
+    """
+    Commit the pending uploads of several FileFields at once, so the model
+    instances can be saved (or bulk_created) without uploading one by one.
+    Files on ImageKitStorage are uploaded concurrently.
+    """
+    pending = [field_file for field_file in field_files if field_file and not field_file._committed]
+    if not pending:
+        return
+
+    storage = pending[0].storage
+    names = [field_file.field.generate_filename(field_file.instance, field_file.name) for field_file in pending]
+    if isinstance(storage, ImageKitStorage) and all(field_file.storage is storage for field_file in pending):
+        stored_names = storage._save_many(
+            (name, field_file.file) for name, field_file in zip(names, pending)
+        )
+    else:
+        stored_names = [
+            field_file.storage.save(name, field_file.file, max_length=field_file.field.max_length)
+            for name, field_file in zip(names, pending)
+        ]
+
+    for field_file, stored_name in zip(pending, stored_names):
+        field_file.name = stored_name
+        field_file._committed = True
@@ -8,7 +8,7 @@ from django.utils.safestring import mark_safe
 from django.urls import reverse
 from django.conf import settings
 from django.forms.widgets import Widget
-from ..seo_utils import SEOManager
+from ..seo_utils import _dumps, _json_ld_script, get_seo_manager
 
 register = template.Library()
 
@@ -22,7 +22,7 @@ def seo_meta_tags(context, title, description, **kwargs):
     {% seo_meta_tags "Page Title" "Page description" keywords="keyword1,keyword2" image="/path/to/image.jpg" %}
     """
     request = context.get('request')
-    seo_manager = SEOManager()
+    seo_manager = get_seo_manager()
     
     # Process keywords
     keywords = kwargs.get('keywords', '')
@@ -51,14 +51,14 @@ def seo_meta_tags(context, title, description, **kwargs):
 @register.simple_tag
 def service_structured_data(service):
     """Generate structured data for a service"""
-    seo_manager = SEOManager()
+    seo_manager = get_seo_manager()
     return mark_safe(seo_manager.generate_service_structured_data(service))
 
 
 @register.simple_tag
 def resource_structured_data(resource):
     """Generate structured data for a resource/article"""
-    seo_manager = SEOManager()
+    seo_manager = get_seo_manager()
     return mark_safe(seo_manager.generate_article_structured_data(resource))
 
 
@@ -72,7 +72,7 @@ def breadcrumbs_structured_data(context, breadcrumbs):
     
     Where breadcrumbs is a list of dicts: [{"name": "Home", "url": "/"}, ...]
     """
-    seo_manager = SEOManager()
+    seo_manager = get_seo_manager()
     return mark_safe(seo_manager.generate_structured_data(
         title="",
         description="",
@@ -316,8 +316,7 @@ def json_ld_website(context):
         }
     }
     
-    import json
-    return mark_safe(f'<script type="application/ld+json">{json.dumps(website_data, indent=2)}</script>')
+    return mark_safe(_json_ld_script(_dumps(website_data)))
 
 
 @register.filter
@@ -351,14 +350,14 @@ def site_logo():
     Usage:
     {% site_logo %}
     """
-    from ..models import SiteConfiguration
+    from ..utils import cached_site_config
     from django.conf import settings
     import logging
 
     logger = logging.getLogger(__name__)
 
     try:
-        config = SiteConfiguration.get_config()
+        config = cached_site_config()
         if config and config.logo:
             logger.debug(f"Using admin uploaded logo: {config.logo.url}")
             return config.logo.url
@@ -386,14 +385,14 @@ def site_favicon():
     Usage:
     {% site_favicon %}
     """
-    from ..models import SiteConfiguration
+    from ..utils import cached_site_config
     from django.conf import settings
     import logging
 
     logger = logging.getLogger(__name__)
 
     try:
-        config = SiteConfiguration.get_config()
+        config = cached_site_config()
         if config and config.favicon:
             logger.debug(f"Using admin uploaded favicon: {config.favicon.url}")
             return config.favicon.url
@@ -422,10 +421,10 @@ def comprehensive_seo_tags(context, title=None, description=None, keywords=None,
     {% comprehensive_seo_tags title="Page Title" description="Page description" keywords="keyword1,keyword2" %}
     """
     from django.conf import settings
-    from ..models import SiteConfiguration
+    from ..utils import cached_site_config
 
     request = context.get('request')
-    config = SiteConfiguration.get_config()
+    config = cached_site_config()
 
     # Build title
     if not title:
@@ -511,8 +510,8 @@ def site_banner():
     Usage:
     {% site_banner %}
     """
-    from ..models import SiteConfiguration
-    config = SiteConfiguration.get_config()
+    from ..utils import cached_site_config
+    config = cached_site_config()
     if config and config.banner_image:
         return config.banner_image.url
     return None  # No fallback for banner
@@ -526,8 +525,8 @@ def site_config():
     Usage:
     {% site_config as config %}
     """
-    from ..models import SiteConfiguration
-    return SiteConfiguration.get_config()
+    from ..utils import cached_site_config
+    return cached_site_config()
 
 
 @register.simple_tag
@@ -538,8 +537,8 @@ def site_hero_image():
     Usage:
     {% site_hero_image %}
     """
-    from ..models import SiteConfiguration
-    config = SiteConfiguration.get_config()
+    from ..utils import cached_site_config
+    config = cached_site_config()
     if config and config.hero_image:
         return config.hero_image.url
     return "https://images.unsplash.com/photo-1522202176988-66273c2fd55f?ixlib=rb-4.0.3&auto=format&fit=crop&w=800&q=80"  # Fallback
@@ -553,8 +552,8 @@ def default_service_image(category_name):
     Usage:
     {% default_service_image "University" %}
     """
-    from ..models import SiteConfiguration
-    config = SiteConfiguration.get_config()
+    from ..utils import cached_site_config
+    config = cached_site_config()
 
     if not config:
         # Return online fallbacks
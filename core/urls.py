@@ -1,6 +1,6 @@
 from django.urls import path
 from django.views.generic import TemplateView
-from .views import HomeView, AboutView, FAQView, health_check, robots_txt
+from .views import HomeView, AboutView, FAQView, health_check, imagekit_auth_token, robots_txt
 
 app_name = 'core'
 
@@ -11,5 +11,6 @@ urlpatterns = [
     path('terms/', TemplateView.as_view(template_name='core/terms.html'), name='terms'),
     path('privacy/', TemplateView.as_view(template_name='core/privacy.html'), name='privacy'),
     path('health/', health_check, name='health_check'),
+    path('imagekit/auth/', imagekit_auth_token, name='imagekit_auth'),
     path('robots.txt', robots_txt, name='robots_txt'),
 ]
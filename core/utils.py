@@ -0,0 +1,34 @@
+"""
+Shared helpers for Edunox GH
+"""
+
+import time
+from functools import lru_cache
+
+from .models import SiteConfiguration
+
+
+# Seconds a worker reuses its cached SiteConfiguration. Saves in the same
+# process clear it immediately (see core.signals); other worker processes
+# pick the change up once the window rolls over.
+SITE_CONFIG_CACHE_TTL = 60
+
+
+@lru_cache(maxsize=1)
+def _site_config_for_window(window):
+    return SiteConfiguration.get_config()
+
+
+def cached_site_config():
+    """
+    Read-only, per-process cached SiteConfiguration.
+
+    Use SiteConfiguration.get_config() instead when the instance is going
+    to be modified and saved.
+    """
+    return _site_config_for_window(int(time.monotonic() // SITE_CONFIG_CACHE_TTL))
+
+
+def clear_site_config_cache():
+    """Drop the cached SiteConfiguration in this process"""
+    _site_config_for_window.cache_clear()
@@ -1,12 +1,20 @@
+import logging
+import time
+
+from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 from django.views.generic import TemplateView
-from django.views.decorators.cache import cache_page
+from django.views.decorators.cache import cache_page, never_cache
+from django.views.decorators.http import require_GET
 from django.utils.decorators import method_decorator
 from django.http import JsonResponse, HttpResponse
 from django.db import connection
-from .models import SiteConfiguration, FAQ
+from .models import FAQ
+from .utils import cached_site_config
 from services.models import Service
 
+logger = logging.getLogger(__name__)
+
 
 # Cache for 5 minutes instead of 15 to allow faster updates
 @method_decorator(cache_page(60 * 5), name='dispatch')  # Cache for 5 minutes
@@ -16,7 +24,7 @@ class HomeView(TemplateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['site_config'] = SiteConfiguration.get_config()
+        context['site_config'] = cached_site_config()
         context['faqs'] = FAQ.objects.filter(is_active=True)[:6]
         context['featured_services'] = Service.objects.filter(is_active=True, is_featured=True)[:3]
         return context
@@ -29,7 +37,7 @@ class AboutView(TemplateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['site_config'] = SiteConfiguration.get_config()
+        context['site_config'] = cached_site_config()
         return context
 
 
@@ -40,7 +48,7 @@ class FAQView(TemplateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['site_config'] = SiteConfiguration.get_config()
+        context['site_config'] = cached_site_config()
         context['faqs'] = FAQ.objects.filter(is_active=True)
         return context
 
@@ -66,6 +74,33 @@ def health_check(request):
         }, status=500)
 
 
+@login_required
+@require_GET
+@never_cache
+def imagekit_auth_token(request):
+    """
+    Signature for uploading a file from the browser straight to ImageKit.
+    The client posts the resulting file id and URL back instead of the file.
+
+    Staff only: each signature lets its holder upload to the site's ImageKit
+    account.
+    """
+    from .storage import DIRECT_UPLOAD_EXPIRY, get_imagekit_client
+
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Staff only'}, status=403)
+
+    try:
+        client = get_imagekit_client()
+    except Exception as e:
+        logger.error(f"ImageKit auth token requested but ImageKit is not configured: {e}")
+        return JsonResponse({'error': 'ImageKit is not configured'}, status=503)
+
+    return JsonResponse(client.get_authentication_parameters(
+        expire=int(time.time()) + DIRECT_UPLOAD_EXPIRY
+    ))
+
+
 def robots_txt(request):
     """Generate robots.txt file"""
     from django.conf import settings
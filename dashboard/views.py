@@ -1331,13 +1331,13 @@ class AdminEmailTestAPIView(UserPassesTestMixin, View):
             use_ssl = config.email_use_ssl
 
             # Provider-specific optimizations
-            if 'gmail.com' in email_host.lower():
+            if config.email_provider == 'gmail':
                 email_host = 'smtp.gmail.com'
                 email_port = 587
                 use_tls = True
                 use_ssl = False
                 print("DEBUG - Applied Gmail-specific settings")
-            elif 'zoho.com' in email_host.lower():
+            elif config.email_provider == 'zoho':
                 email_host = 'smtp.zoho.com'
                 email_port = 587
                 use_tls = True
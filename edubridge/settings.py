@@ -210,6 +210,9 @@ CRISPY_TEMPLATE_PACK = "tailwind"
 
 # Django Allauth
 AUTHENTICATION_BACKENDS = [
+    'core.auth_backends.JoinedModelBackend',
+    'core.auth_backends.JoinedAuthenticationBackend',
+    # Kept so sessions recorded against the stock backends stay valid
     'django.contrib.auth.backends.ModelBackend',
     'allauth.account.auth_backends.AuthenticationBackend',
 ]
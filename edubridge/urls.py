@@ -18,8 +18,8 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from django.contrib.sitemaps.views import sitemap, index
-from core.sitemaps import sitemaps
+from django.contrib.sitemaps.views import index
+from core.sitemaps import sitemap, sitemaps
 from core.views import robots_txt
 
 urlpatterns = [
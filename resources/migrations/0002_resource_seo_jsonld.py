@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resource',
+            name='seo_jsonld',
+            field=models.TextField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def backfill_seo_jsonld(apps, schema_editor):
+    from core.seo_utils import SEOManager
+
+    Resource = apps.get_model('resources', 'Resource')
+    SEOManager().rebuild_article_structured_data(Resource.objects.filter(seo_jsonld__isnull=True))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0002_resource_seo_jsonld'),
+        ('sites', '0002_alter_domain_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_seo_jsonld, migrations.RunPython.noop),
+    ]
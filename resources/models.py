@@ -53,6 +53,12 @@ class Resource(BaseModel):
     # SEO fields
     meta_title = models.CharField(max_length=60, blank=True, help_text="SEO title (max 60 chars)")
     meta_description = models.CharField(max_length=160, blank=True, help_text="SEO description (max 160 chars)")
+
+    # JSON-LD script for the detail page, regenerated on save
+    seo_jsonld = models.TextField(blank=True, null=True, editable=False)
+
+    # Fields the structured data is built from
+    STRUCTURED_DATA_FIELDS = frozenset({'title', 'description', 'featured_image', 'created_at', 'updated_at'})
     
     class Meta:
         verbose_name = "Resource"
@@ -70,6 +76,10 @@ class Resource(BaseModel):
         if not self.meta_description:
             self.meta_description = self.description[:160]
         super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or not self.STRUCTURED_DATA_FIELDS.isdisjoint(update_fields):
+            from core.seo_utils import get_seo_manager
+            get_seo_manager().refresh_article_structured_data(self)
     
     def get_absolute_url(self):
         return reverse('resources:detail', kwargs={'slug': self.slug})
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0002_booking_is_consultancy_booking_booking_quoted_price_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='seo_jsonld',
+            field=models.TextField(blank=True, editable=False, null=True),
+        ),
+    ]
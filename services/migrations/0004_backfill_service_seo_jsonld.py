@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def backfill_seo_jsonld(apps, schema_editor):
+    from core.seo_utils import SEOManager
+
+    Service = apps.get_model('services', 'Service')
+    SEOManager().rebuild_service_structured_data(Service.objects.filter(seo_jsonld__isnull=True))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0003_service_seo_jsonld'),
+        ('sites', '0002_alter_domain_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_seo_jsonld, migrations.RunPython.noop),
+    ]
@@ -51,6 +51,12 @@ class Service(BaseModel):
     is_featured = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
     order = models.PositiveIntegerField(default=0)
+
+    # JSON-LD script for the detail page, regenerated on save
+    seo_jsonld = models.TextField(blank=True, null=True, editable=False)
+
+    # Fields the structured data is built from
+    STRUCTURED_DATA_FIELDS = frozenset({'name', 'description', 'category', 'price', 'image'})
     
     class Meta:
         verbose_name = "Service"
@@ -59,6 +65,13 @@ class Service(BaseModel):
     
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or not self.STRUCTURED_DATA_FIELDS.isdisjoint(update_fields):
+            from core.seo_utils import get_seo_manager
+            get_seo_manager().refresh_service_structured_data(self)
     
     def get_absolute_url(self):
         return reverse('services:detail', kwargs={'pk': self.pk})
@@ -3,16 +3,22 @@ Core functionality tests for EduBridge Ghana
 Tests for views, models, and utilities
 """
 
+import base64
 import pytest
-from django.test import TestCase, Client
+from cryptography.fernet import Fernet
+from django.test import TestCase, Client, RequestFactory, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.conf import settings
 from unittest.mock import patch, Mock
 from core.email_service import EmailService
+from core.models import SiteConfiguration
 from core.seo_utils import SEOManager
 from core.performance import PerformanceMonitor, ImageOptimizer
+from core.utils import cached_site_config, clear_site_config_cache
+from resources.models import Resource, ResourceCategory
+from services.models import Service, ServiceCategory
 
 User = get_user_model()
 
@@ -136,6 +142,99 @@ class EmailServiceTestCase(TestCase):
             self.assertIn('user', kwargs['context'])
 
 
+class SitemapTestCase(TestCase):
+    """Test the streamed sitemap sections"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        author = User.objects.create_user(username='author', password='testpass123')
+        self.service = Service.objects.create(
+            category=ServiceCategory.objects.create(name='Admissions'),
+            name='University Applications',
+            description='Application support',
+            short_description='Application support',
+            duration='2 weeks',
+            features='Document review',
+            price=100
+        )
+        self.resource = Resource.objects.create(
+            title='Scholarship Guide',
+            category=ResourceCategory.objects.create(name='Guides'),
+            description='How to apply for scholarships',
+            author=author
+        )
+    
+    def tearDown(self):
+        cache.clear()
+    
+    def get_section(self, section):
+        response = self.client.get(f'/sitemap-{section}.xml')
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, content
+    
+    def test_sections_match_django_sitemap_view(self):
+        """Streamed sections are byte-identical to django.contrib.sitemaps' view"""
+        from django.contrib.sitemaps.views import sitemap as django_sitemap
+        from core.sitemaps import sitemaps
+        
+        for section in sitemaps:
+            response, content = self.get_section(section)
+            request = RequestFactory().get(f'/sitemap-{section}.xml')
+            expected = django_sitemap(request, sitemaps, section=section).render().content
+            
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(content, expected, section)
+    
+    def test_section_headers(self):
+        """Sections keep Django's X-Robots-Tag and content type"""
+        response, content = self.get_section('services')
+        
+        self.assertEqual(response['Content-Type'], 'application/xml')
+        self.assertEqual(response['X-Robots-Tag'], 'noindex, noodp, noarchive')
+        self.assertIn(f'/services/{self.service.pk}/'.encode(), content)
+    
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_sections_cached_until_content_changes(self):
+        """Rendered sections are served from the cache until a listed object is saved"""
+        first, content = self.get_section('services')
+        cached, cached_content = self.get_section('services')
+        
+        self.assertTrue(first.streaming)
+        self.assertFalse(cached.streaming)
+        self.assertEqual(cached_content, content)
+        self.assertIn('public', cached['Cache-Control'])
+        self.assertIn('max-age=3600', cached['Cache-Control'])
+        
+        new_service = Service.objects.create(
+            category=self.service.category,
+            name='Scholarship Search',
+            description='Scholarship support',
+            short_description='Scholarship support',
+            duration='1 week',
+            features='Shortlist'
+        )
+        refreshed, refreshed_content = self.get_section('services')
+        
+        self.assertTrue(refreshed.streaming)
+        self.assertIn(f'/services/{new_service.pk}/'.encode(), refreshed_content)
+    
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_view_counter_keeps_cache(self):
+        """Counting a resource view doesn't invalidate the cached sitemaps"""
+        self.get_section('resources')
+        self.resource.increment_views()
+        response, content = self.get_section('resources')
+        
+        self.assertFalse(response.streaming)
+    
+    def test_unknown_section_and_page(self):
+        """Unknown sections and pages still 404"""
+        self.assertEqual(self.client.get('/sitemap-missing.xml').status_code, 404)
+        self.assertEqual(self.client.get('/sitemap-services.xml?p=9').status_code, 404)
+        self.assertEqual(self.client.get('/sitemap-services.xml?p=x').status_code, 404)
+
+
 class SEOManagerTestCase(TestCase):
     """Test SEO utilities"""
     
@@ -188,6 +287,148 @@ class SEOManagerTestCase(TestCase):
         
         self.assertIn('BreadcrumbList', structured_data)
         self.assertIn('ListItem', structured_data)
+    
+    def test_score_against_targets_counts_nested_keywords(self):
+        """Each target keyword is counted on its own, even inside a longer one"""
+        from core.seo_utils import AdvancedSEOManager
+        
+        manager = AdvancedSEOManager()
+        manager.target_keywords = ['study abroad', 'abroad', 'Scholarships']
+        content = 'Study abroad with scholarships. Studying ABROAD is easier with SCHOLARSHIPS.'
+        
+        self.assertEqual(
+            manager.score_against_targets(content),
+            {'study abroad': 1, 'abroad': 2, 'Scholarships': 2}
+        )
+        self.assertEqual(manager.score_against_targets(''), {'study abroad': 0, 'abroad': 0, 'Scholarships': 0})
+    
+    def test_score_against_targets_without_ahocorasick(self):
+        """Counting falls back to str.count when pyahocorasick isn't installed"""
+        from core.seo_utils import AdvancedSEOManager
+        
+        manager = AdvancedSEOManager()
+        manager.target_keywords = ['study abroad', 'abroad', 'aa']
+        content = 'Study abroad: studying ABROAD. aaaaa'
+        
+        with patch('core.seo_utils.ahocorasick', None):
+            self.assertEqual(
+                manager.score_against_targets(content),
+                {'study abroad': 1, 'abroad': 2, 'aa': 2}
+            )
+
+
+class StoredStructuredDataTestCase(TestCase):
+    """Test the JSON-LD stored on services and resources"""
+    
+    def setUp(self):
+        self.category = ServiceCategory.objects.create(name='Admissions')
+        self.service = Service.objects.create(
+            category=self.category,
+            name='University Applications',
+            description='Application support',
+            short_description='Application support',
+            duration='2 weeks',
+            features='Document review',
+            price=100
+        )
+        self.resource = Resource.objects.create(
+            title='Scholarship Guide',
+            category=ResourceCategory.objects.create(name='Guides'),
+            description='How to apply for scholarships',
+            author=User.objects.create_user(username='author', password='testpass123')
+        )
+    
+    def stored(self, obj):
+        return type(obj).objects.values_list('seo_jsonld', flat=True).get(pk=obj.pk)
+    
+    def test_stored_on_save(self):
+        """Saving builds the JSON-LD and rendering returns it"""
+        from core.seo_utils import get_seo_manager
+        
+        self.assertIn('University Applications', self.stored(self.service))
+        self.assertIn('Scholarship Guide', self.stored(self.resource))
+        self.assertEqual(
+            get_seo_manager().generate_service_structured_data(self.service), self.stored(self.service)
+        )
+    
+    def test_regenerated_when_fields_change(self):
+        """Changing a structured-data field rebuilds the stored JSON-LD"""
+        self.service.name = 'Graduate Applications'
+        self.service.save(update_fields=['name'])
+        self.resource.title = 'Grant Guide'
+        self.resource.save()
+        
+        self.assertIn('Graduate Applications', self.stored(self.service))
+        self.assertIn('Grant Guide', self.stored(self.resource))
+    
+    def test_timestamp_update_rebuilds_article(self):
+        """Saving only updated_at refreshes the stored dateModified"""
+        from datetime import timedelta
+        from django.utils import timezone
+        
+        before = self.stored(self.resource)
+        later = timezone.now() + timedelta(days=1)
+        with patch('django.utils.timezone.now', return_value=later):
+            self.resource.save(update_fields=['updated_at'])
+        
+        self.assertNotEqual(self.stored(self.resource), before)
+        self.assertIn(later.isoformat(), self.stored(self.resource))
+    
+    def test_view_counter_keeps_stored_data(self):
+        """Counting a view doesn't rebuild the JSON-LD"""
+        with patch('core.seo_utils.SEOManager.refresh_article_structured_data') as refresh:
+            self.resource.increment_views()
+        
+        refresh.assert_not_called()
+    
+    def test_category_rename_rebuilds_services(self):
+        """Renaming a category rebuilds its services' stored JSON-LD"""
+        self.category.name = 'Admissions Support'
+        self.category.save()
+        
+        self.assertIn('Admissions Support', self.stored(self.service))
+    
+    def test_rebuild_fills_missing_rows(self):
+        """Rebuilding a queryset stores JSON-LD on rows that had none"""
+        from core.seo_utils import get_seo_manager
+        
+        Service.objects.update(seo_jsonld=None)
+        Resource.objects.update(seo_jsonld=None)
+        get_seo_manager().rebuild_service_structured_data(Service.objects.filter(seo_jsonld__isnull=True))
+        get_seo_manager().rebuild_article_structured_data(Resource.objects.filter(seo_jsonld__isnull=True))
+        
+        self.assertIn('University Applications', self.stored(self.service))
+        self.assertIn('Scholarship Guide', self.stored(self.resource))
+    
+    def test_read_never_writes(self):
+        """Rendering without a stored copy builds one without touching the row"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from core.seo_utils import get_seo_manager
+        
+        Service.objects.filter(pk=self.service.pk).update(seo_jsonld=None)
+        Resource.objects.filter(pk=self.resource.pk).update(seo_jsonld=None)
+        service = Service.objects.select_related('category').get(pk=self.service.pk)
+        resource = Resource.objects.get(pk=self.resource.pk)
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.assertIn('University Applications', get_seo_manager().generate_service_structured_data(service))
+            self.assertIn('Scholarship Guide', get_seo_manager().generate_article_structured_data(resource))
+        
+        self.assertFalse([query for query in queries if query['sql'].startswith('UPDATE')])
+        self.assertIsNone(self.stored(self.service))
+        self.assertIsNone(self.stored(self.resource))
+    
+    def test_site_change_rebuilds_all(self):
+        """Changing the Site rebuilds every stored JSON-LD block with the new URL"""
+        from django.contrib.sites.models import Site
+        
+        site = Site.objects.get_current()
+        site.domain = 'edunox.example'
+        site.save()
+        
+        self.assertIn('edunox.example', self.stored(self.service))
+        self.assertIn('edunox.example', self.stored(self.resource))
 
 
 class PerformanceTestCase(TestCase):
@@ -209,6 +450,26 @@ class PerformanceTestCase(TestCase):
         self.assertIn('query_count', result)
         self.assertGreater(result['duration'], 0.1)
     
+    def test_forced_query_tracking_without_debug(self):
+        """With tracking forced on and DEBUG off, queries are still counted"""
+        from django.http import HttpResponse
+        from core.performance import PerformanceMiddleware
+        
+        def view(request):
+            User.objects.count()
+            User.objects.exists()
+            return HttpResponse()
+        
+        with override_settings(DEBUG=False), patch('core.performance._TRACK_QUERIES', True):
+            monitor = PerformanceMonitor()
+            monitor.start()
+            User.objects.count()
+            result = monitor.end('Forced tracking')
+            response = PerformanceMiddleware(view)(RequestFactory().get('/'))
+        
+        self.assertEqual(result['query_count'], 1)
+        self.assertEqual(response['X-Query-Count'], '2')
+    
     def test_image_optimizer_initialization(self):
         """Test image optimizer initialization"""
         optimizer = ImageOptimizer()
@@ -217,6 +478,14 @@ class PerformanceTestCase(TestCase):
         self.assertIsInstance(optimizer.max_width, int)
         self.assertIsInstance(optimizer.max_height, int)
     
+    def test_image_processor_defaults_to_pillow(self):
+        """libvips is only used when IMAGE_PROCESSOR asks for it"""
+        from core import performance
+        
+        self.assertFalse(ImageOptimizer().use_vips)
+        with override_settings(IMAGE_PROCESSOR='pyvips'):
+            self.assertEqual(ImageOptimizer().use_vips, performance.pyvips is not None)
+    
     def test_cache_manager_methods(self):
         """Test cache manager methods"""
         from core.performance import CacheManager
@@ -227,6 +496,22 @@ class PerformanceTestCase(TestCase):
         
         # Test cache invalidation (should not raise exception)
         CacheManager.invalidate_pattern('test:*')
+    
+    def test_metrics_survive_unreachable_redis(self):
+        """get_performance_metrics leaves out cache counters when Redis is down"""
+        try:
+            from redis.exceptions import ConnectionError as RedisConnectionError
+        except ImportError:
+            self.skipTest('redis is not installed')
+        from core.optimization import get_performance_metrics
+        
+        client = Mock()
+        client.info.side_effect = RedisConnectionError('Connection refused')
+        with patch('core.optimization._get_redis_client', return_value=client):
+            metrics = get_performance_metrics()
+        
+        self.assertIn('memory_usage', metrics)
+        self.assertNotIn('cache_hits', metrics)
 
 
 class UtilityFunctionsTestCase(TestCase):
@@ -303,6 +588,30 @@ class CacheTestCase(TestCase):
         self.assertEqual(call_count, 1)  # Should not increment
         self.assertEqual(result2, 'result_test')
     
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_smart_cache_keeps_none_with_one_get_and_set(self):
+        """A cached None is a hit, and a miss costs one get and one set"""
+        from core.performance import smart_cache
+        
+        # setUp cleared the settings' cache, not this test's
+        cache.clear()
+        call_count = 0
+        
+        @smart_cache(timeout=60, key_prefix='test')
+        def returns_none():
+            nonlocal call_count
+            call_count += 1
+            return None
+        
+        with patch('core.performance.cache', wraps=cache) as cache_spy:
+            self.assertIsNone(returns_none())
+            self.assertEqual(cache_spy.get.call_count, 1)
+            self.assertEqual(cache_spy.set.call_count, 1)
+            self.assertFalse(cache_spy.get_or_set.called)
+        
+        self.assertIsNone(returns_none())
+        self.assertEqual(call_count, 1)
+    
     def test_cache_invalidation(self):
         """Test cache invalidation"""
         cache.set('test_key', 'test_value', 60)
@@ -312,6 +621,346 @@ class CacheTestCase(TestCase):
         self.assertIsNone(cache.get('test_key'))
 
 
+class SiteConfigurationTestCase(TestCase):
+    """Test SiteConfiguration loading and cache invalidation"""
+    
+    def setUp(self):
+        clear_site_config_cache()
+    
+    def tearDown(self):
+        clear_site_config_cache()
+    
+    def test_get_config_reads_database(self):
+        """get_config() returns the current row, never a cached copy"""
+        config = SiteConfiguration.get_config()
+        SiteConfiguration.objects.filter(pk=config.pk).update(site_name='Changed Elsewhere')
+        
+        self.assertEqual(SiteConfiguration.get_config().site_name, 'Changed Elsewhere')
+    
+    def test_cached_config_cleared_on_save(self):
+        """Saving the configuration replaces the per-process cached copy"""
+        self.assertEqual(cached_site_config().site_name, SiteConfiguration.get_config().site_name)
+        
+        config = SiteConfiguration.get_config()
+        config.site_name = 'Renamed Site'
+        config.save()
+        
+        self.assertEqual(cached_site_config().site_name, 'Renamed Site')
+
+
+class ProfilePictureMiddlewareTestCase(TestCase):
+    """Test the lazily resolved profile_picture_url"""
+    
+    def setUp(self):
+        from core.middleware import ProfilePictureMiddleware
+        self.middleware = ProfilePictureMiddleware(lambda request: None)
+        self.user = User.objects.create_user(username='pictured', password='testpass123')
+    
+    def picture_url(self):
+        request = RequestFactory().get('/dashboard/')
+        request.user = User.objects.get(pk=self.user.pk)
+        self.middleware.process_request(request)
+        return request.user.profile_picture_url
+    
+    def test_url_from_profile(self):
+        """The URL comes from user.profile"""
+        self.user.profile.profile_picture = 'profile_pictures/avatar.jpg'
+        self.user.profile.save()
+        
+        self.assertTrue(str(self.picture_url()).endswith('profile_pictures/avatar.jpg'))
+    
+    def test_missing_profile_or_picture(self):
+        """No picture, or no profile at all, resolves to None"""
+        self.assertFalse(self.picture_url())
+        
+        self.user.profile.delete()
+        self.assertFalse(self.picture_url())
+    
+    def test_storage_error_resolves_to_none(self):
+        """A storage failure while a template reads the URL doesn't break the page"""
+        from unittest.mock import PropertyMock
+        
+        self.user.profile.profile_picture = 'profile_pictures/avatar.jpg'
+        self.user.profile.save()
+        
+        with patch('django.db.models.fields.files.FieldFile.url', new_callable=PropertyMock,
+                   side_effect=OSError('Connection timed out')):
+            self.assertFalse(self.picture_url())
+
+
+@override_settings(FIELD_ENCRYPTION_KEY='kKdb5uNGGHu4bGsT4Sy1i6YtQWqQ6Tf6ApYFzUXk9ZU=')
+class EncryptedCharFieldTestCase(TestCase):
+    """Test EncryptedCharField encryption and reading of older values"""
+    
+    def setUp(self):
+        from core.models import EncryptedCharField
+        self.field = EncryptedCharField(max_length=255)
+        self.fernet = Fernet(settings.FIELD_ENCRYPTION_KEY)
+    
+    def test_aesgcm_round_trip(self):
+        """New values are AES-GCM with a fresh nonce and decrypt back"""
+        from core.models import AESGCM_PREFIX
+        
+        encrypted = self.field.encrypt_value('app-password')
+        self.assertTrue(encrypted.startswith(AESGCM_PREFIX))
+        self.assertNotEqual(encrypted, self.field.encrypt_value('app-password'))
+        self.assertEqual(self.field.encrypt_value(encrypted), encrypted)
+        self.assertEqual(self.field.decrypt_value(encrypted), 'app-password')
+    
+    def test_reads_fernet_values(self):
+        """Fernet tokens, with or without the old extra base64 layer, still decrypt"""
+        token = self.fernet.encrypt(b'old-password')
+        legacy = base64.urlsafe_b64encode(token).decode()
+        
+        self.assertEqual(self.field.decrypt_value(token.decode()), 'old-password')
+        self.assertEqual(self.field.decrypt_value(legacy), 'old-password')
+        self.assertEqual(
+            self.field.bulk_decrypt([token.decode(), legacy, 'plain', '']),
+            ['old-password', 'old-password', 'plain', '']
+        )
+    
+    def test_unreadable_values_pass_through(self):
+        """Plaintext and values encrypted with another key come back unchanged"""
+        other = Fernet(Fernet.generate_key()).encrypt(b'secret').decode()
+        self.assertEqual(self.field.decrypt_value('not-encrypted'), 'not-encrypted')
+        self.assertEqual(self.field.decrypt_value(other), other)
+    
+    def test_stored_encrypted(self):
+        """The database holds ciphertext and the model reads plaintext"""
+        from django.db import connection
+        from core.models import AESGCM_PREFIX
+        
+        config = SiteConfiguration.objects.create(email_host_password='smtp-secret')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT email_host_password FROM {SiteConfiguration._meta.db_table} WHERE id = %s',
+                [config.pk]
+            )
+            stored = cursor.fetchone()[0]
+        
+        self.assertTrue(stored.startswith(AESGCM_PREFIX))
+        self.assertEqual(SiteConfiguration.objects.get(pk=config.pk).email_host_password, 'smtp-secret')
+
+
+class LoggingQueueTestCase(TestCase):
+    """Test the background log listener"""
+    
+    def tearDown(self):
+        from core.logging_queue import stop_listener
+        stop_listener()
+    
+    def test_queue_config_detected(self):
+        """Only a LOGGING dict routed through log_queue needs the listener"""
+        from core.logging_queue import uses_log_queue
+        from core.optimization import LOGGING_OPTIMIZATIONS
+        
+        self.assertTrue(uses_log_queue(LOGGING_OPTIMIZATIONS))
+        self.assertFalse(uses_log_queue(settings.LOGGING))
+        self.assertFalse(uses_log_queue(None))
+    
+    def test_start_listener_creates_log_dir(self):
+        """The log file lives under BASE_DIR and the listener starts once"""
+        import os
+        import tempfile
+        import core.logging_queue
+        
+        self.assertIsNone(core.logging_queue._listener)
+        with tempfile.TemporaryDirectory() as base_dir, override_settings(BASE_DIR=base_dir):
+            listener = core.logging_queue.start_listener()
+            self.assertIs(core.logging_queue.start_listener(), listener)
+            self.assertTrue(os.path.isfile(os.path.join(base_dir, 'logs', 'django.log')))
+            core.logging_queue.stop_listener()
+
+
+@override_settings(
+    IMAGEKIT_PRIVATE_KEY='private_test',
+    IMAGEKIT_PUBLIC_KEY='public_test',
+    IMAGEKIT_URL_ENDPOINT='https://ik.imagekit.io/test'
+)
+class ImageKitAuthTokenTestCase(TestCase):
+    """Test the direct-upload signature endpoint"""
+    
+    def setUp(self):
+        import core.storage
+        core.storage._imagekit_client = None
+        self.url = reverse('core:imagekit_auth')
+    
+    def tearDown(self):
+        import core.storage
+        core.storage._imagekit_client = None
+    
+    def test_requires_staff(self):
+        """Anonymous users are sent to login and regular users are refused"""
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+        
+        User.objects.create_user(username='member', password='testpass123')
+        self.client.login(username='member', password='testpass123')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+    
+    def test_staff_get_signature(self):
+        """Staff receive an uncached token, expiry and signature"""
+        User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.client.login(username='staff', password='testpass123')
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), {'token', 'expire', 'signature'})
+        self.assertIn('no-store', response['Cache-Control'])
+    
+    def test_uploaded_reference_must_be_on_endpoint(self):
+        """Recorded direct uploads are stored by path and must come from our endpoint"""
+        from django.core.exceptions import SuspiciousFileOperation
+        from core.storage import ImageKitStorage
+        
+        storage = ImageKitStorage()
+        self.assertEqual(
+            storage.save_from_uploaded_reference(
+                'avatar.png', 'file_1', 'https://ik.imagekit.io/test/edunox/images/avatar.png'
+            ),
+            'edunox/images/avatar.png'
+        )
+        with self.assertRaises(SuspiciousFileOperation):
+            storage.save_from_uploaded_reference('avatar.png', 'file_2', 'https://evil.example/avatar.png')
+
+
+@override_settings(
+    IMAGEKIT_PRIVATE_KEY='private_test',
+    IMAGEKIT_PUBLIC_KEY='public_test',
+    IMAGEKIT_URL_ENDPOINT='https://ik.imagekit.io/test'
+)
+class ImageKitStorageTestCase(TestCase):
+    """Test content sniffing, folder routing and upload requests for ImageKit"""
+    
+    PDF_BYTES = b'%PDF-1.4\n1 0 obj\n<< /Type /Catalog >>\nendobj\n'
+    PNG_BYTES = b'\x89PNG\r\n\x1a\n' + b'\x00\x00\x00\rIHDR' + b'\x00' * 17
+    
+    def setUp(self):
+        import core.storage
+        core.storage._imagekit_client = None
+    
+    def tearDown(self):
+        import core.storage
+        core.storage._imagekit_client = None
+    
+    def require_magic(self):
+        import core.storage
+        if core.storage._magic is None:
+            self.skipTest('python-magic or libmagic is not installed')
+    
+    def upload(self, name, data, response=None):
+        """Save through ImageKitStorage and return the keyword arguments it posted with"""
+        from django.core.files.base import ContentFile
+        from core.storage import ImageKitStorage
+        
+        if response is None:
+            response = Mock(status_code=200)
+            response.json.return_value = {}
+        with patch('core.storage.get_imagekit_session') as get_session:
+            get_session.return_value.post.return_value = response
+            ImageKitStorage()._save(name, ContentFile(data))
+        return get_session.return_value.post.call_args.kwargs
+    
+    def upload_folder(self, name, data):
+        return self.upload(name, data)['data'].fields['folder']
+    
+    def test_sniff_mime(self):
+        """The type comes from the bytes, is cached, and leaves the file rewound"""
+        from django.core.files.base import ContentFile
+        from core.storage import sniff_mime
+        
+        self.require_magic()
+        content = ContentFile(self.PDF_BYTES, name='notes.jpg')
+        self.assertEqual(sniff_mime(content), 'application/pdf')
+        self.assertEqual(content.tell(), 0)
+        self.assertEqual(content._sniffed_mime, 'application/pdf')
+        self.assertEqual(sniff_mime(ContentFile(self.PNG_BYTES)), 'image/png')
+    
+    def test_folder_follows_content(self):
+        """A misnamed upload goes to the folder for what it really is"""
+        self.require_magic()
+        self.assertEqual(self.upload_folder('scan.jpg', self.PDF_BYTES), '/edunox/documents/')
+        self.assertEqual(self.upload_folder('photo.pdf', self.PNG_BYTES), '/edunox/images/')
+    
+    def test_unknown_content_uses_name(self):
+        """Content libmagic can't place falls back to the name"""
+        self.assertEqual(self.upload_folder('service_banner.bin', b'\x00\x01\x02\x03'), '/edunox/services/')
+    
+    def test_upload_has_timeout(self):
+        """A stalled ImageKit connection can't hold the worker forever"""
+        from core.storage import UPLOAD_TIMEOUT
+        
+        self.assertEqual(self.upload('notes.txt', b'notes')['timeout'], UPLOAD_TIMEOUT)
+    
+    def test_rejected_upload_raises_sdk_exception(self):
+        """Error responses raise the SDK's exceptions instead of returning a path"""
+        import json
+        from requests.models import Response
+        from imagekitio.exceptions.UnauthorizedException import UnauthorizedException
+        
+        response = Response()
+        response.status_code = 401
+        response._content = json.dumps({'message': 'Your account cannot be authenticated.'}).encode()
+        with self.assertRaises(UnauthorizedException):
+            self.upload('notes.txt', b'notes', response=response)
+
+
+@override_settings(
+    IMAGEKIT_PRIVATE_KEY='private_test',
+    IMAGEKIT_PUBLIC_KEY='public_test',
+    IMAGEKIT_URL_ENDPOINT='https://ik.imagekit.io/test',
+    DEFAULT_FILE_STORAGE='core.storage.ImageKitStorage'
+)
+class ContactAttachmentUploadTestCase(TestCase):
+    """Test that contact attachments are uploaded as one batch"""
+    
+    def setUp(self):
+        import core.storage
+        core.storage._imagekit_client = None
+    
+    def tearDown(self):
+        import core.storage
+        core.storage._imagekit_client = None
+    
+    def test_attachments_uploaded_together(self):
+        """Every attachment goes through one _save_many call and gets a row"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from contact.models import ContactAttachment
+        from core.storage import ImageKitStorage
+        
+        def post_upload(url, data, headers, timeout):
+            response = Mock(status_code=200)
+            response.json.return_value = {'filePath': f"/edunox/documents/{data.fields['fileName']}"}
+            return response
+        
+        files = [
+            SimpleUploadedFile('transcript.pdf', b'%PDF-1.4 transcript', content_type='application/pdf'),
+            SimpleUploadedFile('notes.txt', b'plain notes', content_type='text/plain'),
+        ]
+        with patch('core.storage.get_imagekit_session') as get_session, \
+                patch.object(ImageKitStorage, '_save_many', autospec=True,
+                             side_effect=ImageKitStorage._save_many) as save_many:
+            get_session.return_value.post.side_effect = post_upload
+            response = self.client.post(reverse('contact:contact'), {
+                'name': 'Test User',
+                'email': 'test@example.com',
+                'subject': 'Documents',
+                'message': 'Please review my documents',
+                'attachments': files,
+            })
+        
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(save_many.call_count, 1)
+        self.assertEqual(get_session.return_value.post.call_count, 2)
+        
+        attachments = ContactAttachment.objects.order_by('original_filename')
+        self.assertEqual(
+            [(a.original_filename, a.file_size) for a in attachments],
+            [('notes.txt', 11), ('transcript.pdf', 19)]
+        )
+        for attachment in attachments:
+            self.assertTrue(attachment.file.name.startswith('edunox/documents/'))
+
+
 @pytest.mark.django_db
 class IntegrationTestCase(TestCase):
     """Integration tests"""